@@ -1,170 +1,760 @@
+import io
 import os
-import json
-import tempfile
+import subprocess
+import atexit
+import random
 import threading
 import sys
 import re
+from contextlib import contextmanager, nullcontext
 
+import importlib.util
 import click
-import requests
-import urllib3
-import difflib
 from dotenv import load_dotenv
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cache_store
+from host_index import HostIndex, host_matches, rack_position
+from host_columns import HostColumns
+from inventory_summary import summarize
+from search_index import SearchIndex
+from value_catalog import ValueCatalog, field_value
+
+# requests/urllib3 and ijson are imported where they are used, so commands served
+# from the cache never pay for loading them
 
 CACHE_DURATION = 2000  # 5 minutes
-CACHE_FILE = os.path.join(tempfile.gettempdir(), 'labops_cache.json')
+WARM_UNUSED_AFTER = 3 * CACHE_DURATION  # Hosts filter sets no command read for this long aren't warmed
+K2_MAX_WORKERS = 8  # Concurrent /interfaces requests for bulk K2 lookups
+K2_TIMEOUT = 5  # Seconds per /interfaces request
+K2_CACHE_DURATION = 86400  # 24 hours - interface assignments rarely change
+K2_NEGATIVE_CACHE_DURATION = 120  # 2 minutes for "no K2" and failed lookups
+K2_CACHE_ENABLED = os.getenv("LABOPS_NO_K2_CACHE", "").lower() not in ("1", "true", "yes")
+DEFAULT_LOCATION = 'SEA85'  # Location prefix used when no --location is given
+# Push status/location/platform filters to the /hosts endpoint instead of downloading everything
+SERVER_SIDE_FILTERS = os.getenv("LABOPS_SERVER_FILTERS", "").lower() in ("1", "true", "yes")
+# Parse /hosts incrementally (needs ijson) so only the hosts a command keeps are held in memory
+STREAM_HOSTS = importlib.util.find_spec("ijson") is not None and os.getenv("LABOPS_NO_STREAM", "").lower() not in ("1", "true", "yes")
+# Refresh expired datasets with conditional requests (ETag / If-Modified-Since) and ?since= deltas
+INCREMENTAL_REFRESH = os.getenv("LABOPS_NO_INCREMENTAL", "").lower() not in ("1", "true", "yes")
+# Fetch hosts as one dataset per site (from /sites), downloaded concurrently and expiring independently
+SHARDED_FETCH = os.getenv("LABOPS_SHARDED_FETCH", "").lower() in ("1", "true", "yes")
+SHARD_WORKERS = int(os.getenv("LABOPS_SHARD_WORKERS", "4"))  # Site shards downloaded at once
+SITES_CACHE_DURATION = 86400  # 24 hours - the list of sites rarely changes
+# Records per page for full /hosts and /switches downloads (0 = one response with everything)
+PAGE_SIZE = int(os.getenv("LABOPS_PAGE_SIZE", "0"))
+PAGE_WORKERS = int(os.getenv("LABOPS_PAGE_WORKERS", "4"))  # Pages downloaded at once after the first
+# Seconds past CACHE_DURATION that expired data is still served while a background refresh runs (0 = off)
+STALE_WINDOW = int(os.getenv("LABOPS_STALE_WINDOW", "3600"))
+REVALIDATE_CLAIM_SECONDS = 300  # Longest a background refresh may run before another one can start
+# Terminal progress timer and notices for slow fetches; full-screen frontends (the TUI) switch them off
+SHOW_PROGRESS = True
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+HTTP_TIMEOUT = (5, 120)  # Default (connect, read) timeout in seconds for API calls
+HTTP_RETRIES = 3  # Retries for connection errors and 429/5xx responses
+HTTP_BACKOFF = 0.5  # Base of the exponential backoff between retries, in seconds
+HTTP_POOL_SIZE = max(K2_MAX_WORKERS, PAGE_WORKERS, 10)  # Keep-alive connections per host, sized for the K2 and page pools
 
 load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
 API_KEY = os.getenv("API_KEY", "mock-secret-token")
 
+_session = None
+_session_lock = threading.Lock()
 
 
+def _jitter_retry_class():
+    from urllib3.util.retry import Retry
+
+    class _JitterRetry(Retry):
+        """Retry with exponential backoff plus random jitter, so parallel clients don't retry in lockstep"""
+
+        def get_backoff_time(self):
+            backoff = super().get_backoff_time()
+            return backoff + random.uniform(0, HTTP_BACKOFF) if backoff else backoff
+
+    return _JitterRetry
+
+
+def get_session():
+    """Shared keep-alive session used for every API call (requests is imported on first use)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                import urllib3
+                from requests.adapters import HTTPAdapter
+
+                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+                session = requests.Session()
+                session.headers["X-Api-Key"] = API_KEY
+                session.verify = False
+                retry = _jitter_retry_class()(
+                    total=HTTP_RETRIES,
+                    backoff_factor=HTTP_BACKOFF,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(["GET"]),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                # K2 lookups get one attempt each: retrying read timeouts would multiply K2_TIMEOUT,
+                # and a missing K2 IP is cached briefly and retried on a later lookup anyway
+                session.mount(f"{_k2_base_url()}/interfaces/",
+                              HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0))
+                _session = session
+    return _session
+
+
+def _api_get(url, **kwargs):
+    """GET through the shared session with the default timeout"""
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    return get_session().get(url, **kwargs)
+
+
+def connection_stats():
+    """Requests sent vs. connections opened by the shared session; the difference is connection reuse"""
+    stats = {'requests': 0, 'connections': 0}
+    if _session is not None:
+        for adapter in set(_session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                stats['requests'] += pool.num_requests
+                stats['connections'] += pool.num_connections
+    stats['reused'] = stats['requests'] - stats['connections']
+    return stats
+
+
+if os.getenv("LABOPS_HTTP_STATS", "").lower() in ("1", "true", "yes"):
+    atexit.register(lambda: sys.stderr.write(
+        "HTTP: {requests} requests over {connections} connections ({reused} reused)\n".format(**connection_stats())))
+
+# In-process memo of structures derived from one hosts snapshot, keyed by its cache timestamp
+_host_index_memo = {}  # cache key -> HostIndex
+_racks_memo = {'index': None, 'racks': None}  # Aggregation for the HostIndex it was built from
+_search_memo = {'index': None, 'search': None}  # SearchIndex for the HostIndex it was built from
+_catalog_memo = {}  # (hosts cache key, field) -> (HostIndex, ValueCatalog built from it)
+_columns_memo = {}  # hosts cache key -> (HostIndex, HostColumns built from it)
+_shard_memo = {}  # shard set cache key -> (shard host lists, hosts merged from them)
+_summary_memo = {}  # (location, group_by) -> (HostIndex, switches, summary built from them)
+_fresh_after = 0  # Cached data older than this is never served (set by --fresh)
+_stale_notices = set()  # Datasets this process already printed a "data is N minutes old" notice for
+
+
+def _hosts_cache_key(params=None):
+    """Cache key for a /hosts query - the full inventory, or one entry per server-side filter set"""
+    if not params:
+        return 'hosts'
+    return 'hosts--' + '--'.join(f"{name}={value.lower()}" for name, value in sorted(params.items()))
+
+
+@contextmanager
+def _fetch_progress(label):
+    """Show a live timer with animated dots while a fetch is running"""
+    if not SHOW_PROGRESS:
+        yield
+        return
+
+    start_time = time.time()
+    timer_running = True
+    
+    def show_timer():
+        dot_cycle = 0
+        while timer_running:
+            elapsed = int(time.time() - start_time)
+            dots = [".  ", ".. ", "..."][dot_cycle % 3]
+            sys.stderr.write(f"\rFetching {label} from API{dots} Elapsed: {elapsed}.0s")
+            sys.stderr.flush()
+            dot_cycle += 1
+            time.sleep(0.5)
+    
+    # Start timer thread
+    timer_thread = threading.Thread(target=show_timer, daemon=True)
+    timer_thread.start()
+    
+    try:
+        yield
+    finally:
+        # Stop timer
+        timer_running = False
+        elapsed = int(time.time() - start_time)
+        sys.stderr.write(f"\rData retrieved successfully in {elapsed}.0s\n")
+        sys.stderr.flush()
+
+
+def require_fresh():
+    """Make this process wait for current data instead of serving anything cached before now"""
+    global _fresh_after
+    _fresh_after = time.time()
+
+
+def _cache_state(cached_at, now):
+    """'fresh', 'stale' (expired but servable while revalidating) or 'expired' for a cached dataset"""
+    if cached_at < _fresh_after:
+        return 'expired'
+    age = now - cached_at
+    if age < CACHE_DURATION:
+        return 'fresh'
+    if age < CACHE_DURATION + STALE_WINDOW:
+        return 'stale'
+    return 'expired'
+
+
+def _revalidate_in_background(label, keys, cached_at, now):
+    """Note that stale data is being served and start a detached 'labops cache warm' for the stale
+    datasets (keys) that no other process is already refreshing"""
+    if SHOW_PROGRESS and label not in _stale_notices:
+        _stale_notices.add(label)
+        minutes = int((now - cached_at) // 60)
+        click.echo(f"Note: {label} data is {minutes} minutes old, refreshing in the background "
+                   f"(use --fresh to wait for current data)", err=True)
+
+    # Claims are released by the warm command when it finishes
+    keys = [key for key in keys if cache_store.claim(f"revalidate-{key}", REVALIDATE_CLAIM_SECONDS)]
+    if not keys:
+        return
+    try:
+        subprocess.Popen([sys.executable, '-m', 'rack_cli', 'cache', 'warm',
+                          *(arg for key in keys for arg in ('--only', key))],
+                         cwd=os.path.dirname(os.path.abspath(__file__)),
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+    except OSError:
+        for key in keys:
+            cache_store.release(f"revalidate-{key}")
+
+
+def _hosts_cache_state(cache_key):
+    """_cache_state of a hosts dataset from its metadata alone, or 'expired' if it isn't cached"""
+    meta = cache_store.load_meta(cache_key)
+    return _cache_state(meta.get('time', 0), time.time()) if meta else 'expired'
+
+
+def _hosts_cache_fresh(cache_key):
+    """True if the cached dataset is within CACHE_DURATION (reads only its metadata)"""
+    return _hosts_cache_state(cache_key) == 'fresh'
+
+
+def _hosts_of(data):
+    """Records of a /hosts (or any listing) payload ({"response": [...]} or a bare list)"""
+    if isinstance(data, dict) and 'response' in data:
+        return data['response']
+    return data
+
+
+def _load_hosts(params=None):
+    """Return (hosts list, cache generation), fetching from the API when the cache has expired"""
+    if params and 'sites' in params:
+        return _load_shards(params)
+    cache_key = _hosts_cache_key(params)
+    cache_store.mark_read(cache_key)
 
-def get_hosts(status=None, platform=None, hostname=None,
-              usagetype=None, location=None,
-              checkout_owner=None, bmc=False, no_bmc=False, limit=None, search_all=False):
-    """
-    Fetch hosts from the API with optional filtering.
-    """
     # Check cache first
     now = time.time()
-    cache_data = _load_cache()
-    
-    if 'hosts' in cache_data and now - cache_data.get('hosts_time', 0) < CACHE_DURATION:
-        data = cache_data['hosts']
-    else:
-        # Fetch from API with live timer and animated dots
-        start_time = time.time()
-        timer_running = True
-        
-        def show_timer():
-            dot_cycle = 0
-            while timer_running:
-                elapsed = int(time.time() - start_time)
-                dots = [".  ", ".. ", "..."][dot_cycle % 3]
-                sys.stdout.write(f"\rFetching hosts from API{dots} Elapsed: {elapsed}.0s")
-                sys.stdout.flush()
-                dot_cycle += 1
-                time.sleep(0.5)
-        
-        # Start timer thread
-        timer_thread = threading.Thread(target=show_timer, daemon=True)
-        timer_thread.start()
-        
+    data, cached_at = _load_cache(cache_key)
+    state = _cache_state(cached_at, now) if data is not None else 'expired'
+
+    if state == 'stale':
+        _revalidate_in_background('hosts', [cache_key], cached_at, now)
+    elif state == 'expired':
+        data = _refresh_hosts(cache_key, params, data, now)
+        cached_at = now
+
+    # Extract hosts array from API response
+    return _hosts_of(data), cached_at
+
+
+def _sync_state(response):
+    """Sync point reported by the API, stored with the cached dataset for the next refresh"""
+    state = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'cursor': response.headers.get('X-Sync-Cursor'),
+    }
+    return {name: value for name, value in state.items() if value}
+
+
+def _conditional_request(cache_key, cached_data):
+    """Headers and extra params for refreshing a cached dataset incrementally"""
+    if not INCREMENTAL_REFRESH or cached_data is None:
+        return {}, {}
+    meta = cache_store.load_meta(cache_key)
+    headers, params = {}, {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    if meta.get('cursor'):
+        params['since'] = meta['cursor']
+    return headers, params
+
+
+def _can_refresh_incrementally(cache_key):
+    """True if an expired dataset has a sync point, so refreshing it won't need a full download"""
+    if not INCREMENTAL_REFRESH:
+        return False
+    meta = cache_store.load_meta(cache_key)
+    return any(meta.get(name) for name in ('etag', 'last_modified', 'cursor'))
+
+
+def _merge_host_delta(cached_data, delta):
+    """Apply a {"response": [changed], "deleted": [ids]} delta to a cached hosts payload"""
+    def host_key(host):
+        return str(host.get('id', host.get('assetid')))
+
+    hosts = cached_data['response'] if isinstance(cached_data, dict) else cached_data
+    merged = {host_key(h): h for h in hosts}
+    for host_id in delta.get('deleted') or []:
+        merged.pop(str(host_id), None)
+    for host in delta.get('response') or []:
+        merged[host_key(host)] = host  # Changed hosts keep their position, new ones go last
+
+    hosts = list(merged.values())
+    return {'response': hosts, 'count': len(hosts)}
+
+
+class _ListingChanged(RuntimeError):
+    """A paginated listing moved to a new version between pages"""
+
+
+def _listing_version(response):
+    """Version of the whole listing a page belongs to; an ETag may hash just that page's body"""
+    return response.headers.get('X-Sync-Cursor') or response.headers.get('Last-Modified')
+
+
+def _get_listing(url, params=None, headers=None, sync_params=None, paged=True):
+    """
+    GET a /hosts or /switches listing, a page at a time when PAGE_SIZE is set and paged is true.
+
+    Returns (response, data, pages): the first response and its parsed body (None on a 304),
+    and an iterator over every record when the listing spans several pages (else None).
+    Conditional headers and sync params only go with the first request.
+    """
+    paged = paged and PAGE_SIZE > 0
+    params = dict(params or {})
+    if paged:
+        params['limit'] = PAGE_SIZE
+    response = _api_get(url, headers=headers, params={**params, **(sync_params or {})} or None)
+    response.raise_for_status()
+    if response.status_code == 304:
+        return response, None, None
+
+    data = response.json()
+    if not paged or response.headers.get('X-Sync-Delta'):
+        return response, data, None  # Deltas are small and arrive whole
+    first_page = _hosts_of(data) or []
+    total = response.headers.get('X-Total-Count') or (data.get('total') if isinstance(data, dict) else None)
+    cursor = response.headers.get('X-Next-Cursor')
+    if total is not None and int(total) > len(first_page) > 0:
+        return response, data, _listing_pages(url, params, response, first_page, total=int(total))
+    if total is None and cursor:
+        return response, data, _listing_pages(url, params, response, first_page, cursor=cursor)
+    return response, data, None
+
+
+def _listing_pages(url, params, first, first_page, total=None, cursor=None):
+    """
+    Yield the records of a paginated listing in order. Offset pages are fetched
+    PAGE_WORKERS at a time, with at most that many waiting to be consumed;
+    cursor pages can only be fetched one after another.
+    Raises _ListingChanged if the listing's version changes between pages.
+    """
+    version = _listing_version(first)
+
+    def get_page(page_params):
+        response = _api_get(url, params={**params, **page_params})
+        response.raise_for_status()
+        # Pages of different versions would miss or repeat records, so never commit a mix
+        if version and _listing_version(response) != version:
+            raise _ListingChanged(f"{url} changed while it was being downloaded; try again")
+        return response
+
+    yield from first_page
+    if total is not None:
+        size = len(first_page)  # The server may cap pages below PAGE_SIZE
+        offsets = iter(range(size, total, size))
+        workers = max(PAGE_WORKERS, 1)
+        executor = ThreadPoolExecutor(max_workers=workers)
         try:
-            headers = {"X-Api-Key": API_KEY}
-            response = requests.get(f"{API_BASE_URL}/hosts", headers=headers, verify=False)
+            pending = deque()
+            for offset in offsets:
+                pending.append(executor.submit(get_page, {'offset': offset, 'limit': size}))
+                if len(pending) == workers:
+                    break
+            while pending:
+                page = _hosts_of(pending.popleft().result().json()) or []
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(executor.submit(get_page, {'offset': offset, 'limit': size}))
+                yield from page
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return
+
+    while cursor:
+        response = get_page({'cursor': cursor})
+        yield from _hosts_of(response.json()) or []
+        cursor = response.headers.get('X-Next-Cursor')
+
+
+def _refresh_hosts(cache_key, params, cached_data, now, progress=True):
+    """Fetch /hosts, sending the last sync point so unchanged or lightly changed data moves little"""
+    sync_headers, sync_params = _conditional_request(cache_key, cached_data)
+
+    with _fetch_progress("hosts") if progress else nullcontext():
+        for paged in (True, False):
+            response, data, pages = _get_listing(f"{API_BASE_URL}/hosts", params, sync_headers, sync_params, paged)
+
+            if response.status_code == 304:
+                # Nothing changed since the last sync - keep the snapshot and restart its TTL
+                cache_store.touch(cache_key, now)
+                return cached_data
+            if pages is None:
+                break
+
+            # Pages are written to the cache as they arrive instead of after the last one
+            meta = {**_sync_state(response), 'params': params}
+            try:
+                hosts = list(cache_store.save_stream(cache_key, pages, now, meta))
+            except _ListingChanged:
+                continue  # Changed mid-download; fetch it again in one response
+            data = {'response': hosts, 'count': len(hosts)}
+            cache_store.remember(cache_key, data, now)
+            return data
+
+    if response.headers.get('X-Sync-Delta') and cached_data is not None:
+        data = _merge_host_delta(cached_data, data)
+
+    # Cache the response
+    _save_cache(cache_key, data, now, {**_sync_state(response), 'params': params})
+    return data
+
+
+def _stream_hosts(params=None):
+    """Yield host records from /hosts as they are parsed, writing each one to the cache on the way"""
+    cache_key = _hosts_cache_key(params)
+    cache_store.mark_read(cache_key)
+    with _api_get(f"{API_BASE_URL}/hosts", params=params, stream=True) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True  # Let urllib3 undo any gzip/deflate encoding
+        response.raw.auto_close = False  # BufferedReader must see EOF, not a closed file
+        body = io.BufferedReader(response.raw, buffer_size=65536)
+
+        # Either {"response": [...]} or a bare list of hosts
+        prefix = 'item' if body.peek(64).lstrip()[:1] == b'[' else 'response.item'
+        import ijson
+        records = ijson.items(body, prefix, use_float=True)
+        yield from cache_store.save_stream(cache_key, records, time.time(),
+                                           {**_sync_state(response), 'params': params})
+
+
+def get_sites(fetch=True):
+    """Site prefixes from /sites (cached for SITES_CACHE_DURATION), or None if the API has no /sites.
+
+    With fetch=False only a cached list is used.
+    """
+    now = time.time()
+    data, cached_at = _load_cache('sites')
+    if data is None or now - cached_at >= SITES_CACHE_DURATION:
+        if not fetch:
+            return None
+        response = _api_get(f"{API_BASE_URL}/sites")
+        if response.status_code == 404:
+            data = {'response': None}  # Remember that this API can't be sharded
+        else:
             response.raise_for_status()
             data = response.json()
-        finally:
-            # Stop timer
-            timer_running = False
-            elapsed = int(time.time() - start_time)
-            sys.stdout.write(f"\rData retrieved successfully in {elapsed}.0s\n")
-            sys.stdout.flush()
+        _save_cache('sites', data, now)
+    records = _hosts_of(data)
+    if records is None:
+        return None
+    return [record['site'] if isinstance(record, dict) else record for record in records]
 
-        # Cache the response
-        _save_cache('hosts', data, now)
 
-    # Extract hosts array from API response
-    if isinstance(data, dict) and 'response' in data:
-        hosts = data['response']
-    else:
-        hosts = data
+def shard_params(location, fetch=True):
+    """
+    Hosts params for a location: in sharded mode the site shards covering it
+    ({"sites": "SEA85"}, or every site for "all"), otherwise None for the single /hosts dataset.
+    """
+    if not SHARDED_FETCH:
+        return None
+    sites = get_sites(fetch)
+    if sites is None:
+        return None  # No /sites - fall back to the single /hosts download
+    prefix = (location or 'all').upper()
+    if prefix != 'ALL':
+        site = prefix.split('.')[0]
+        # "SEA85.161" pins down one site; "SEA" may cover several
+        sites = [s for s in sites if (s.upper() == site if '.' in prefix else s.upper().startswith(site))]
+    return {'sites': ','.join(sites)}
+
+
+def _shards(params):
+    """Per-site /hosts params of a shard set"""
+    return [{'location': site} for site in params['sites'].split(',') if site]
+
+
+def _load_shards(params):
+    """(hosts, generation) for a shard set: every site's dataset, fetching expired ones concurrently"""
+    now = time.time()
+    loaded, expired, stale = {}, [], []
+    for shard in _shards(params):
+        cache_key = _hosts_cache_key(shard)
+        data, cached_at = _load_cache(cache_key)
+        state = _cache_state(cached_at, now) if data is not None else 'expired'
+        if state == 'expired':
+            expired.append((cache_key, shard, data))
+            continue
+        if state == 'stale':
+            stale.append((cache_key, cached_at))
+        loaded[cache_key] = (_hosts_of(data), cached_at)
+    if stale:
+        # Only the stale shards - the other sites' datasets are left alone
+        _revalidate_in_background('hosts', [key for key, _ in stale], min(at for _, at in stale), now)
+
+    if expired:
+        def refresh(job):
+            cache_key, shard, data = job
+            return cache_key, _refresh_hosts(cache_key, shard, data, now, progress=False)
+
+        # One progress timer for all of them - per-shard timers would draw over each other
+        with _fetch_progress(f"hosts for {len(expired)} sites"), \
+                ThreadPoolExecutor(max_workers=min(SHARD_WORKERS, len(expired))) as executor:
+            for cache_key, data in executor.map(refresh, expired):
+                loaded[cache_key] = (_hosts_of(data), now)
+
+    parts = [loaded[_hosts_cache_key(shard)][0] or [] for shard in _shards(params)]
+    generation = max((cached_at for _, cached_at in loaded.values()), default=now)
+    if len(parts) == 1:
+        return parts[0], generation
+
+    # Hand back the same merged list while no shard changed, so indexes built on it stay memoized
+    memo_key = _hosts_cache_key(params)
+    memo = _shard_memo.get(memo_key)
+    if memo is None or len(memo[0]) != len(parts) or any(a is not b for a, b in zip(memo[0], parts)):
+        memo = _shard_memo[memo_key] = (parts, [host for part in parts for host in part])
+    return memo[1], generation
+
+
+def _hosts_fresh(params=None):
+    """True if every dataset behind a hosts query is within CACHE_DURATION (reads only metadata)"""
+    if params and 'sites' in params:
+        return all(_hosts_cache_fresh(_hosts_cache_key(shard)) for shard in _shards(params))
+    return _hosts_cache_fresh(_hosts_cache_key(params))
 
-    # Status filtering
+
+def _can_stream(params):
+    """True if a hosts query should be parsed off a streaming download (cold cache, no sync point)"""
+    if not STREAM_HOSTS or PAGE_SIZE > 0 or (params and 'sites' in params):
+        return False  # Site shards and pages are fetched concurrently as whole documents instead
+    cache_key = _hosts_cache_key(params)
+    return _hosts_cache_state(cache_key) == 'expired' and not _can_refresh_incrementally(cache_key)
+
+
+def get_host_index(params=None):
+    """Return the HostIndex for the current hosts snapshot, rebuilding it only when the data changes"""
+    hosts, generation = _load_hosts(params)
+    cache_key = _hosts_cache_key(params)
+    index = _host_index_memo.get(cache_key)
+    # Same list object means the cache layer handed back the same payload (a 304 only touches the TTL)
+    if index is None or index.hosts is not hosts:
+        index = _host_index_memo[cache_key] = HostIndex(hosts, generation)
+    return index
+
+
+def _server_filter_params(status=None, location=None, platform=None):
+    """Query parameters for the filters the /hosts endpoint can apply itself"""
+    params = {}
     if status:
-        hosts = [h for h in hosts if h.get("status", {}).get("status", "").lower() == status.lower()]
-    
-    # BMC filtering
-    if bmc:
-        hosts = [h for h in hosts if h.get("con_ip") and h.get("con_ip").strip()]
-    elif no_bmc:
-        hosts = [h for h in hosts if not h.get("con_ip") or not h.get("con_ip").strip()]
-
-    # Location filtering
-    if location:
-        if location.upper() == 'ALL':
-            # Show all hosts - no filtering
-            pass
-        else:
-            hosts = [h for h in hosts if h.get('location', '').upper().startswith(location.upper())]
+        params['status'] = status
+    if location and location.upper() != 'ALL':
+        params['location'] = location
+    if platform:
+        params['platform'] = platform
+    return params
+
+
+def find_host(query):
+    """Find a cached host by exact asset ID or hardware ID"""
+    return get_host_index(shard_params('all')).find(query)
+
+
+def get_value_catalog(field, params=None):
+    """ValueCatalog of one host field over a hosts dataset, rebuilt only when the hosts data changes"""
+    index = get_host_index(params)
+    memo_key = (_hosts_cache_key(params), field)
+    memo = _catalog_memo.get(memo_key)
+    if memo is None or memo[0] is not index:
+        memo = _catalog_memo[memo_key] = (index, ValueCatalog.of(index.hosts, field))
+    return memo[1]
+
+
+def get_search_index():
+    """Return the SearchIndex over all cached hosts, rebuilding it only when the hosts data changes"""
+    index = get_host_index(shard_params('all'))
+    if _search_memo['index'] is not index:
+        _search_memo['search'] = SearchIndex(index.hosts)
+        _search_memo['index'] = index
+    return _search_memo['search']
+
+
+def get_host_columns(params=None):
+    """Return the HostColumns for a hosts dataset, rebuilding them only when the hosts data changes"""
+    index = get_host_index(params)
+    cache_key = _hosts_cache_key(params)
+    memo = _columns_memo.get(cache_key)
+    if memo is None or memo[0] is not index:
+        memo = _columns_memo[cache_key] = (index, HostColumns(index.hosts))
+    return memo[1]
+
+
+def get_summary(location=None, group_by=()):
+    """Summary stats for a location (see inventory_summary), recomputed only when hosts or switches change"""
+    location = location or DEFAULT_LOCATION
+    params = shard_params(location)
+    index = get_host_index(params)
+    switches = get_switches()
+    memo_key = (location.upper(), tuple(group_by))
+    memo = _summary_memo.get(memo_key)
+    # get_switches() hands back the same list until the switches cache changes
+    if memo is None or memo[0] is not index or memo[1] is not switches:
+        columns = get_host_columns(params)
+        summary = summarize(columns, columns.where_location(location), switches, group_by)
+        memo = _summary_memo[memo_key] = (index, switches, summary)
+    return memo[2]
+
+
+def get_hosts(status=None, platform=None, hostname=None,
+              usagetype=None, location=None,
+              checkout_owner=None, bmc=False, no_bmc=False, limit=None, search_all=False,
+              server_filter=None):
+    """
+    Fetch hosts from the API with optional filtering.
+
+    With server_filter (default: SERVER_SIDE_FILTERS) the status, location and platform
+    filters are sent as query parameters and each filter set is cached separately.
+    Local filtering still runs on the result, so an API that ignores them stays correct.
+    """
+    if server_filter is None:
+        server_filter = SERVER_SIDE_FILTERS
+    # Defaults to SEA85 hosts only; "all" disables location filtering
+    location = location or DEFAULT_LOCATION
+    params = _server_filter_params(status, location, platform) if server_filter else shard_params(location)
+
+    if _can_stream(params):
+        # Cold cache: filter records as they stream in and keep only the matches
+        with _fetch_progress("hosts"):
+            hosts = [h for h in _stream_hosts(params)
+                     if host_matches(h, status=status, location=location, bmc=bmc, no_bmc=no_bmc)]
+        streamed = hosts
+
+        def catalog(field):
+            return ValueCatalog.of(streamed, field)
+
+        def select_platform(name):
+            return [h for h in hosts if (h.get("platform") or "").lower() == name.lower()]
     else:
-        # Default to SEA85 hosts only
-        hosts = [h for h in hosts if h.get('location', '').upper().startswith('SEA85')]
+        index = get_host_index(params)
+
+        # Status, BMC and location filtering via the index posting lists
+        hosts = index.filter(status=status, location=location, bmc=bmc, no_bmc=no_bmc)
+
+        def catalog(field):
+            return get_value_catalog(field, params)
+
+        def select_platform(name):
+            return index.filter(status=status, location=location, platform=name, bmc=bmc, no_bmc=no_bmc)
+
+    # Hostname, usage type and checkout owner: the exact value, else every value starting with it.
+    # Near misses are only suggested - for ownership and audit filters they'd be wrong answers.
+    notes = []
+    field_filters = [(field, query) for field, query in
+                     (('hostname', hostname), ('usagetype', usagetype), ('checkout_owner', checkout_owner)) if query]
+    for field, query in field_filters:
+        values = catalog(field)
+        wanted = values.resolve(query)
+        option = '--' + field.replace('_', '-')
+        if not wanted:
+            close = [values.names[key] for key in values.similar(query, limit=5)]
+            notes.append(f"no {option} matches '{query}'" + (f"; did you mean {', '.join(close)}?" if close else ''))
+        elif wanted != [query.strip().lower()]:
+            names = [values.names[key] for key in wanted]
+            more = f" and {len(names) - 5} more" if len(names) > 5 else ''
+            notes.append(f"{option} '{query}' matched {', '.join(names[:5])}{more}")
+        wanted = set(wanted)
+        hosts = [h for h in hosts if (field_value(h, field) or '').lower() in wanted]
+    if field_filters:
+        narrowed = hosts
+
+        def select_platform(name):
+            return [h for h in narrowed if (h.get("platform") or "").lower() == name.lower()]
     
     # Platform filtering with fuzzy matching
     if platform:
-        # Single pass to get platforms and exact matches
-        all_platforms = set()
-        exact_matches = []
-
-        for h in hosts:
-            host_platform = h.get("platform")
-            if host_platform:
-                all_platforms.add(host_platform)
-                if host_platform.lower() == platform.lower():
-                    exact_matches.append(h)
+        exact_matches = select_platform(platform)
 
         if exact_matches:
             hosts = exact_matches
         else:
-            # First try prefix matching (e.g., "monza" matches "MONZA91", "MONZA92", etc.)
-            platform_list = list(all_platforms)
-            prefix_matches = [p for p in platform_list if p.lower().startswith(platform.lower())]
-            
-            if prefix_matches:
-                close_matches = sorted(prefix_matches)  # Sort alphabetically
-            else:
-                # Fall back to fuzzy matching if no prefix matches
-                platform_list_lower = [p.lower() for p in platform_list]
-                close_matches_lower = difflib.get_close_matches(platform.lower(), platform_list_lower, n=10, cutoff=0.2)
-                
-                # Map back to original case
-                close_matches = []
-                for match_lower in close_matches_lower:
-                    for original in platform_list:
-                        if original.lower() == match_lower:
-                            close_matches.append(original)
-                            break
+            if params and 'platform' in params:
+                # The server only returned this platform - load the platform-less set for suggestions
+                hosts = get_hosts(status=status, hostname=hostname, usagetype=usagetype, location=location,
+                                  checkout_owner=checkout_owner, bmc=bmc, no_bmc=no_bmc,
+                                  server_filter=True)['response']
+                notes = []  # That call already reported how the field filters resolved
+                platform_params = _server_filter_params(status, location)
 
-            if close_matches:
-                click.echo(f"No hosts found with platform '{platform}'.\n")
-                click.echo("Did you mean one of these?")
+                def catalog(field):
+                    return get_value_catalog(field, platform_params)
+
+                def select_platform(name):
+                    return [h for h in hosts if (h.get("platform") or "").lower() == name.lower()]
 
-                # Pre-calculate counts
-                platform_counts = {}
-                for h in hosts:
-                    p = h.get("platform")
-                    if p in close_matches:
-                        platform_counts[p] = platform_counts.get(p, 0) + 1
+            # Prefix ("monza" -> MONZA91, MONZA92...), substring or n-gram matches from the catalog
+            platforms = catalog('platform')
+            platform_counts = dict.fromkeys(platforms.suggest(platform), 0)
+
+            # Count matching hosts in one pass; suggestions absent from the filtered hosts are dropped
+            for h in hosts:
+                key = (h.get("platform") or "").lower()
+                if key in platform_counts:
+                    platform_counts[key] += 1
+            close_matches = [platforms.names[key] for key, count in platform_counts.items() if count]
+
+            if close_matches:
+                click.echo(f"No hosts found with platform '{platform}'.\n", err=True)
+                click.echo("Did you mean one of these?", err=True)
 
                 total_hosts = 0
                 for i, match in enumerate(close_matches, 1):
-                    count = platform_counts.get(match, 0)
+                    count = platform_counts[match.lower()]
                     total_hosts += count
-                    click.echo(f"  {i}. {match} ({count} hosts)")
+                    click.echo(f"  {i}. {match} ({count} hosts)", err=True)
                 
-                click.echo(f"\nTotal: {total_hosts} hosts across all {platform.upper()}* platforms")
+                click.echo(f"\nTotal: {total_hosts} hosts across all {platform.upper()}* platforms", err=True)
 
                 choice = click.prompt("\nEnter number to select, or press Enter to cancel",
-                                      type=int, default=0, show_default=False)
+                                      type=int, default=0, show_default=False, err=True)
 
                 if 1 <= choice <= len(close_matches):
                     selected_platform = close_matches[choice - 1]
-                    hosts = [h for h in hosts if h.get("platform") == selected_platform]
-                    click.echo(f"\nShowing hosts with platform '{selected_platform}'...\n")
+                    hosts = select_platform(selected_platform)
+                    click.echo(f"\nShowing hosts with platform '{selected_platform}'...\n", err=True)
                 else:
                     return {"response": [], "count": 0}
             else:
-                click.echo(f"No hosts found with platform '{platform}' and no similar matches.")
+                click.echo(f"No hosts found with platform '{platform}' and no similar matches.", err=True)
                 return {"response": [], "count": 0}
 
+    for note in notes:
+        click.echo(f"Note: {note}", err=True)
+
     # Apply limit if specified
     total_count = len(hosts)
     if limit and limit > 0:
@@ -174,84 +764,178 @@ def get_hosts(status=None, platform=None, hostname=None,
 
 
 
+def iter_hosts(status=None, location=None, bmc=False, no_bmc=False, server_filter=None):
+    """
+    Yield hosts matching the status, location and BMC filters as soon as each one is available.
 
-def get_racks():
-    """Get rack information by extracting from hosts data"""
-    # Get hosts data (which includes rack info)
-    hosts_data = get_hosts()
-    hosts = hosts_data['response']
-    
-    # Extract unique racks
+    On a cold cache the hosts come straight off the streaming /hosts download, otherwise from
+    the index. Exhaust the generator so a streamed download is committed to the cache.
+    """
+    if server_filter is None:
+        server_filter = SERVER_SIDE_FILTERS
+    location = location or DEFAULT_LOCATION
+    params = _server_filter_params(status, location) if server_filter else shard_params(location)
+
+    if _can_stream(params):
+        for host in _stream_hosts(params):
+            if host_matches(host, status=status, location=location, bmc=bmc, no_bmc=no_bmc):
+                yield host
+    else:
+        yield from get_host_index(params).filter(status=status, location=location, bmc=bmc, no_bmc=no_bmc)
+
+
+def refresh_hosts(params=None):
+    """Refresh a hosts dataset now regardless of its age; returns the number of hosts cached"""
+    cache_key = _hosts_cache_key(params)
+    data, _ = _load_cache(cache_key)
+    data = _refresh_hosts(cache_key, params, data, time.time())
+    return len(_hosts_of(data) or [])
+
+
+def refresh_switches():
+    """Refresh the switches dataset now regardless of its age; returns the number of switches cached"""
+    data, _ = _load_cache('switches')
+    return len(_refresh_switches(data, time.time()) or [])
+
+
+def warmable_datasets():
+    """
+    (cache key, refresh function) for all hosts (or every site shard), each hosts filter set
+    a command read within WARM_UNUSED_AFTER seconds, and switches
+    """
+    sites = shard_params('all')
+    params_list = _shards(sites) if sites else [None]
+    now = time.time()
+    for key in cache_store.datasets():
+        if key.startswith('hosts--'):
+            params = cache_store.load_meta(key).get('params')
+            if not params or params in params_list:
+                continue
+            # One-off or mistyped filter combinations stop being downloaded once nobody reads them
+            if now - cache_store.last_read(_hosts_cache_key(params)) < WARM_UNUSED_AFTER:
+                params_list.append(params)
+
+    datasets = [(_hosts_cache_key(params), lambda p=params: refresh_hosts(p)) for params in params_list]
+    datasets.append(('switches', refresh_switches))
+    return datasets
+
+
+def k2_cache_summary():
+    """(entries still servable, total entries) in the K2 interfaces cache"""
+    now = time.time()
+    entries = _load_cache('interfaces')[0] or {}
+    fresh = sum(1 for entry in entries.values()
+                if now - entry.get('time', 0) < (K2_CACHE_DURATION if entry.get('ip') else K2_NEGATIVE_CACHE_DURATION))
+    return fresh, len(entries)
+
+
+def _add_host_to_rack(racks_dict, host, position):
+    """Add a host's rack summary entry, creating the rack record on first sight"""
+    rack_info = host.get('serverrack') or {}
+    location = (host.get('location') or '').strip()
+
+    if position not in racks_dict:
+        racks_dict[position] = {
+            'position': position,
+            'lab': rack_info.get('lab') or ('SEALAB85' if location.startswith('SEA85') else None),
+            'consolevlan': rack_info.get('consolevlan'),
+            'host_count': 0,
+            'hosts': []
+        }
+
+    racks_dict[position]['host_count'] += 1
+    racks_dict[position]['hosts'].append({
+        'id': host.get('id'),
+        'assetid': host.get('assetid'),
+        'platform': host.get('platform'),
+        'hardwareid': host.get('hardwareid'),
+        'status': (host.get('status') or {}).get('status'),
+        'location': host.get('location'),
+        'con_ip': host.get('con_ip'),
+        'lan_ip': host.get('lan_ip')
+    })
+
+
+def _get_racks_dict():
+    """Rack position -> rack record for the default location, rebuilt only when the hosts cache changes"""
+    params = shard_params(DEFAULT_LOCATION)
+    index = get_host_index(params)
+    if _racks_memo['index'] is index:
+        return _racks_memo['racks']
+
+    # Extract unique racks from the same host set get_hosts() returns by default
     racks_dict = {}
-    for host in hosts:
-        rack_info = host.get('serverrack', {})
-        position = rack_info.get('position')
-        location = host.get('location', '').strip()
-        
+    for host in index.filter(location=DEFAULT_LOCATION):
         # Use serverrack.position if available, otherwise extract from location
-        if position:
-            rack_position = position.strip()
-        elif location:
-            # Remove everything after first whitespace (space, tab, etc.)
-            rack_position = location.rstrip().split()[0] if location.rstrip().split() else location.rstrip()
-        else:
+        position = rack_position(host)
+        if not position:
             continue  # Skip hosts without rack info
-        
-        if rack_position not in racks_dict:
-            racks_dict[rack_position] = {
-                'position': rack_position,
-                'lab': rack_info.get('lab') or ('SEALAB85' if location.startswith('SEA85') else None),
-                'consolevlan': rack_info.get('consolevlan'),
-                'host_count': 0,
-                'hosts': []
-            }
-        
-        racks_dict[rack_position]['host_count'] += 1
-        racks_dict[rack_position]['hosts'].append({
-            'id': host.get('id'),
-            'assetid': host.get('assetid'),
-            'platform': host.get('platform'),
-            'hardwareid': host.get('hardwareid'),
-            'status': host.get('status', {}).get('status'),
-            'location': host.get('location'),
-            'con_ip': host.get('con_ip'),
-            'lan_ip': host.get('lan_ip')
-        })
-    
-    # Convert to list
-    racks = list(racks_dict.values())
-    
-    return racks
+        _add_host_to_rack(racks_dict, host, position)
+
+    # Status breakdown per rack in one crosstab over the status codes
+    columns = get_host_columns(params)
+    by_rack = columns.crosstab('rack', 'status', columns.where_location(DEFAULT_LOCATION), missing='Unknown')
+    for position, rack in racks_dict.items():
+        rack['status_counts'] = dict(sorted(by_rack.get(position, {}).items()))
+
+    _racks_memo['racks'] = racks_dict
+    _racks_memo['index'] = index
+    return racks_dict
+
+
+def get_racks():
+    """Get rack information by extracting from hosts data"""
+    # New list each call so callers can sort/filter it; the aggregation itself is memoized
+    return list(_get_racks_dict().values())
 
 def get_rack_by_position(position):
     """Get rack by position"""
-    racks = get_racks()
-    for rack in racks:
-        if rack.get('position') == position:
-            return rack
-    return None
+    index = get_host_index(shard_params(DEFAULT_LOCATION))
+    if _racks_memo['index'] is index:
+        return _racks_memo['racks'].get(position)
+
+    # No aggregation for this snapshot yet - build just this rack instead of all of them
+    prefix = DEFAULT_LOCATION.upper()
+    racks_dict = {}
+    for host in index.rack_hosts(position):
+        if (host.get('location') or '').upper().startswith(prefix):
+            _add_host_to_rack(racks_dict, host, position)
+    return racks_dict.get(position)
 
 def get_rack_details(rack_id):
     """Get detailed rack information including switches"""
-    headers = {"X-Api-Key": API_KEY}
-    response = requests.get(f"{API_BASE_URL}/serverracks/details?id={rack_id}", headers=headers, verify=False)
+    response = _api_get(f"{API_BASE_URL}/serverracks/details", params={"id": rack_id})
     response.raise_for_status()
     return response.json()
 
+def _refresh_switches(cached_data, now):
+    """Fetch /switches, revalidating the cached copy with its ETag when there is one"""
+    sync_headers, _ = _conditional_request('switches', cached_data)
+    for paged in (True, False):
+        response, data, pages = _get_listing(f"{API_BASE_URL}/switches", headers=sync_headers, paged=paged)
+        if response.status_code == 304:
+            cache_store.touch('switches', now)
+            return cached_data
+        # Paged or not, switches are cached as a bare list (they're few; hosts pages stream to disk)
+        try:
+            data = list(pages) if pages is not None else _hosts_of(data)
+            break
+        except _ListingChanged:
+            continue  # Changed mid-download; fetch it again in one response
+    _save_cache('switches', data, now, _sync_state(response))
+    return data
+
 def get_switches(status=None, rack=None, location=None, search_all=False):
     now = time.time()
-    cache_data = _load_cache()
-    
-    if 'switches' in cache_data and now - cache_data.get('switches_time', 0) < CACHE_DURATION:
-        data = cache_data['switches']
-    else:
-        click.echo("Fetching switches from API...")
-        headers = {"X-Api-Key": API_KEY}
-        response = requests.get(f"{API_BASE_URL}/switches", headers=headers, verify=False)
-        response.raise_for_status()
-        data = response.json()
-        click.echo("✓ Data retrieved successfully")
-        _save_cache('switches', data, now)
+    data, cached_at = _load_cache('switches')
+    state = _cache_state(cached_at, now) if data is not None else 'expired'
+
+    if state == 'stale':
+        _revalidate_in_background('switches', ['switches'], cached_at, now)
+    elif state == 'expired':
+        click.echo("Fetching switches from API...", err=True)
+        data = _refresh_switches(data, now)
+        click.echo("✓ Data retrieved successfully", err=True)
 
     # Basic local filtering (mock)
     if status:
@@ -263,29 +947,104 @@ def get_switches(status=None, rack=None, location=None, search_all=False):
 
 def get_host_by_asset_id(asset_id):
     """Get host by asset ID"""
-    headers = {"X-Api-Key": API_KEY}
-    response = requests.get(f"{API_BASE_URL}/hosts/find?assetid={asset_id}", headers=headers, verify=False)
+    response = _api_get(f"{API_BASE_URL}/hosts/find", params={"assetid": asset_id})
     response.raise_for_status()
     return response.json()
 
 def get_host_by_hardware_id(hardware_id):
     """Get host status by hardware ID"""
-    headers = {"X-Api-Key": API_KEY}
-    response = requests.get(f"{API_BASE_URL}/hosts/hoststatus?hardwareid={hardware_id}", headers=headers, verify=False)
+    response = _api_get(f"{API_BASE_URL}/hosts/hoststatus", params={"hardwareid": hardware_id})
     response.raise_for_status()
     return response.json()
 
-def get_k2_ip(hardware_id):
-    """Get K2 IP from interfaces endpoint"""
+def peek_host(query):
+    """Find a host by asset ID or hardware ID in the hosts cache, only if it is fresh (never fetches)"""
+    params = shard_params('all', fetch=False)
+    if not _hosts_fresh(params):
+        return None
+    return get_host_index(params).find(query)
+
+def _fetch_host(asset_id=None, hardware_id=None):
+    """Full host record from the API: find by asset ID, or hoststatus -> find for a hardware ID"""
+    if hardware_id:
+        hw_result = get_host_by_hardware_id(hardware_id)
+        host = hw_result.get('response', hw_result)
+        if host.get('assetid'):
+            full_result = get_host_by_asset_id(host['assetid'])
+            host = full_result.get('response', full_result)
+        return host
+    result = get_host_by_asset_id(asset_id)
+    return result.get('response', result)
+
+
+def get_host_with_k2(asset_id=None, hardware_id=None, pending=None):
+    """Resolve a host and its K2 IP with as few sequential round trips as possible.
+
+    A fresh hosts cache answers without touching the API. Otherwise the K2 lookup
+    runs alongside the hoststatus -> find chain when the hardware ID is already known.
+    Returns (host, k2_ip). pending is passed on to get_k2_ips.
+    """
+    cached_host = peek_host(hardware_id or asset_id)
+    if cached_host:
+        return cached_host, get_k2_ip(cached_host.get('hardwareid'), pending=pending)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        k2_future = executor.submit(get_k2_ip, hardware_id, pending=pending) if hardware_id else None
+        host = _fetch_host(asset_id, hardware_id)
+        k2_ip = k2_future.result() if k2_future else None
+
+    # The speculative K2 lookup used the ID as typed; retry with the canonical one if it differs
+    if not k2_ip and host.get('hardwareid') and host.get('hardwareid') != hardware_id:
+        k2_ip = get_k2_ip(host['hardwareid'], pending=pending)
+    return host, k2_ip
+
+def get_k2_ip(hardware_id, timeout=K2_TIMEOUT, use_cache=True, pending=None):
+    """Get K2 IP from interfaces endpoint (cached per hardware ID)"""
     if not hardware_id:
         return None
-    
+    return get_k2_ips([hardware_id], timeout=timeout, use_cache=use_cache, pending=pending).get(hardware_id)
+
+def get_k2_ips(hardware_ids, max_workers=K2_MAX_WORKERS, timeout=K2_TIMEOUT, use_cache=True, pending=None):
+    """Resolve K2 IPs for many hardware IDs concurrently.
+
+    Cached answers are served without a request; only the misses hit /interfaces.
+    Returns a dict of hardware ID -> K2 IP (None when not found, failed or timed out).
+
+    With pending (a dict), fetched answers are collected there instead of being cached
+    right away, so many single lookups can be saved in one cache_k2_ips() write.
+    """
+    # Deduplicate while skipping empty IDs
+    unique_ids = list(dict.fromkeys(hw for hw in hardware_ids if hw))
+    if not unique_ids:
+        return {}
+
+    use_cache = use_cache and K2_CACHE_ENABLED
+    results = _get_cached_k2_ips(unique_ids) if use_cache else {}
+    if use_cache and pending:
+        results.update((hw, pending[hw]) for hw in unique_ids if hw in pending)
+    missing = [hw for hw in unique_ids if hw not in results]
+
+    if missing:
+        workers = max(1, min(max_workers, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fetched = dict(zip(missing, executor.map(lambda hw: _fetch_k2_ip(hw, timeout), missing)))
+        results.update(fetched)
+        if use_cache and pending is not None:
+            pending.update(fetched)
+        elif use_cache:
+            cache_k2_ips(fetched)
+
+    return {hw: results.get(hw) for hw in unique_ids}
+
+def _k2_base_url():
+    """Base URL of the interfaces endpoint, which is not under the /track path"""
+    return API_BASE_URL.replace('/api/v1/track', '/api/v1')
+
+def _fetch_k2_ip(hardware_id, timeout=K2_TIMEOUT):
+    """Fetch a K2 IP from the interfaces endpoint, returning None on any failure"""
     try:
-        headers = {"X-Api-Key": API_KEY}
-        # Interfaces endpoint is not under /track path
-        base_url = API_BASE_URL.replace('/api/v1/track', '/api/v1')
-        url = f"{base_url}/interfaces/{hardware_id}"
-        response = requests.get(url, headers=headers, verify=False)
+        url = f"{_k2_base_url()}/interfaces/{hardware_id}"
+        response = _api_get(url, timeout=timeout)
         response.raise_for_status()
         data = response.json()
         
@@ -298,23 +1057,44 @@ def get_k2_ip(hardware_id):
     except Exception:
         return None
 
-def _load_cache():
-    """Load cache from file"""
-    try:
-        with open(CACHE_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+def _get_cached_k2_ips(hardware_ids):
+    """Return cached K2 IPs that are still within their TTL (negative entries included)"""
+    now = time.time()
+    entries = _load_cache('interfaces')[0] or {}
+    cached = {}
+    for hw in hardware_ids:
+        entry = entries.get(hw)
+        if not entry:
+            continue
+        ttl = K2_CACHE_DURATION if entry.get('ip') else K2_NEGATIVE_CACHE_DURATION
+        if now - entry.get('time', 0) < ttl:
+            cached[hw] = entry.get('ip')
+    return cached
 
-def _save_cache(key, data, timestamp):
-    """Save data to cache file"""
-    cache_data = _load_cache()
-    cache_data[key] = data
-    cache_data[f'{key}_time'] = timestamp
-    
-    try:
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(cache_data, f)
-    except Exception:
-        pass  # Fail silently if can't write cache
+def cache_k2_ips(k2_ips):
+    """Store K2 lookups in the cache, pruning entries that can no longer be served"""
+    now = time.time()
+
+    def merge(entries):
+        entries = {
+            hw: entry for hw, entry in (entries or {}).items()
+            if now - entry.get('time', 0) < (K2_CACHE_DURATION if entry.get('ip') else K2_NEGATIVE_CACHE_DURATION)
+        }
+        for hw, ip in k2_ips.items():
+            entries[hw] = {'ip': ip, 'time': now}
+        return entries
+
+    # Merge under the dataset lock so concurrent labops runs don't drop each other's entries
+    _update_cache('interfaces', merge, now)
+
+def _load_cache(key):
+    """Load a single dataset from the cache, returning (data, timestamp)"""
+    return cache_store.load(key)
+
+def _save_cache(key, data, timestamp, meta=None):
+    """Save a single dataset to the cache, with optional sync metadata"""
+    cache_store.save(key, data, timestamp, meta)
 
+def _update_cache(key, func, timestamp):
+    """Atomically merge into a cached dataset"""
+    cache_store.update(key, func, timestamp)
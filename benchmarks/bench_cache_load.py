@@ -0,0 +1,81 @@
+"""Compare cache load time per payload format for realistic inventory sizes
+
+    python benchmarks/bench_cache_load.py [--sizes 1000,10000,50000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache_store
+
+STATUSES = ['Available', 'Reserved', 'Checked Out', 'In Qual', 'Pending Admin']
+PLATFORMS = ['HUMBOLDT21', 'MONZA91', 'MONZA92', 'DELL-R740', 'HP-DL380', 'SUPERMICRO-X11']
+
+
+def make_hosts(count):
+    """Build a /hosts response shaped like the production API"""
+    hosts = []
+    for i in range(count):
+        room = [159, 6920, 7100][i % 3]
+        rack = f"SEA85.{room}.R{i % 12}-L{i % 40:02d}"
+        hosts.append({
+            'id': i,
+            'assetid': str(1700000000 + i),
+            'hardwareid': f"SNX.HMBLT21N{i:010d}",
+            'hostname': f"host-{i}.sea85.example.com",
+            'platform': PLATFORMS[i % len(PLATFORMS)],
+            'manufacturer': 'SNX',
+            'hostclass': 'compute',
+            'installed_os': 'linux',
+            'status': {'id': i % 5, 'status': STATUSES[i % len(STATUSES)]},
+            'usagetype': {'id': i % 3, 'usagetype': 'General Use'},
+            'location': f"{rack} {i % 42}",
+            'con_ip': f"172.16.{i // 250 % 250}.{i % 250}",
+            'lan_ip': f"10.20.{i // 250 % 250}.{i % 250}",
+            'serverrack': {'position': rack, 'lab': 'SEALAB85',
+                           'consolevlan': {'vlanid': 100 + room % 50, 'subnet': f"172.16.{room % 250}.0/24"}},
+            'hwmon_timestamp': '2025-01-01T00:00:00Z',
+        })
+    return {'response': hosts}
+
+
+def time_load(repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data, _ = cache_store.load('hosts')
+        elapsed = time.perf_counter() - start
+        assert data is not None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000,50000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    formats = sorted(cache_store._SERIALIZERS)
+    print(f"{'Hosts':>8} " + " ".join(f"{fmt + ' (ms)':>14} {'size (MB)':>10}" for fmt in formats))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_store.CACHE_DIR = tmp
+        for size in (int(s) for s in args.sizes.split(',')):
+            payload = make_hosts(size)
+            row = [f"{size:>8}"]
+            for fmt in formats:
+                cache_store.CACHE_FORMAT = fmt
+                cache_store.save('hosts', payload, time.time())
+                suffix = cache_store._SERIALIZERS[fmt][0]
+                size_mb = os.path.getsize(cache_store._path('hosts', suffix)) / 1e6
+                row.append(f"{time_load(args.repeat) * 1000:>14.1f} {size_mb:>10.1f}")
+            print(" ".join(row))
+
+
+if __name__ == '__main__':
+    main()
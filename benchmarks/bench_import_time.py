@@ -0,0 +1,79 @@
+"""Measure CLI startup import time and fail when it goes over budget
+
+    python benchmarks/bench_import_time.py [--repeat 5] [--top 8] [--budget-scale 1.0]
+
+Each scenario imports what a command loads before doing any work, in a fresh interpreter
+under `python -X importtime`. The best cumulative time over --repeat runs is compared with
+the scenario's budget, and modules that only network calls need must not be loaded at all.
+Exits non-zero on any violation, so it can run in CI.
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# scenario -> (statement run at startup, budget in ms)
+SCENARIOS = {
+    'labops --help': ("import rack_cli", 80),
+    'labops <assetid> (cached)': ("import rack_cli, commands.lookup", 120),
+    'labops hosts': ("import rack_cli, commands.list_hosts", 120),
+    'labops hosts (via daemon)': ("import rack_cli, labops_daemon", 100),
+}
+# Only needed once a request actually goes out (or for the TUI)
+DEFERRED_MODULES = ('requests', 'urllib3', 'ijson', 'difflib', 'textual')
+
+
+def import_times(statement):
+    """Run statement under -X importtime; return [(cumulative us, self us, module)] for its imports"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    # Interpreter startup (site and its imports) finishes first - keep only what follows it
+    site = max((i for i, row in enumerate(rows) if row[2] == ' site'), default=-1)
+    return rows[site + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='Slowest modules to list per scenario')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiply every budget (slow CI machines)')
+    args = parser.parse_args()
+
+    failures = []
+    for scenario, (statement, budget_ms) in SCENARIOS.items():
+        budget_ms *= args.budget_scale
+        best, best_rows = None, []
+        for _ in range(args.repeat):
+            rows = import_times(statement)
+            # Top-level entries (one leading space) hold the cumulative time of everything below them
+            total_ms = sum(cumulative for cumulative, _, name in rows if not name.startswith('  ')) / 1000
+            if best is None or total_ms < best:
+                best, best_rows = total_ms, rows
+
+        loaded = {name.strip() for _, _, name in best_rows}
+        deferred = sorted(m for m in DEFERRED_MODULES if m in loaded)
+        ok = best <= budget_ms and not deferred
+        print(f"{'ok  ' if ok else 'FAIL'} {scenario:<28} {best:7.1f} ms  (budget {budget_ms:.0f} ms)")
+        for _, self_us, name in sorted(best_rows, reverse=True, key=lambda row: row[1])[:args.top]:
+            print(f"       {self_us / 1000:6.1f} ms  {name.strip()}")
+        if deferred:
+            print(f"       loaded at startup but should be deferred: {', '.join(deferred)}")
+        if not ok:
+            failures.append(scenario)
+
+    if failures:
+        print(f"\nOver budget: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
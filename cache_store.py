@@ -0,0 +1,351 @@
+# On-disk cache backend: one payload file per dataset with atomic writes and file locks
+import gc
+import os
+import json
+import pickle
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows - fall back to atomic renames only
+    fcntl = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+CACHE_DIR = os.getenv("LABOPS_CACHE_DIR", os.path.join(tempfile.gettempdir(), 'labops_cache'))
+# Payload encoding: "json" (default), or the faster-loading "pickle" / "msgpack"
+CACHE_FORMAT = os.getenv("LABOPS_CACHE_FORMAT", "json").lower()
+PICKLE_HEADER = b'LABOPS-CACHE-PICKLE-1\n'  # Bump the version when the snapshot layout changes
+
+# Payloads already decoded by this process: key -> (generation, data)
+_memory = {}
+
+
+def _path(key, suffix):
+    """Build the file path for a dataset, keeping the key filesystem-safe"""
+    safe_key = "".join(c if c.isalnum() or c in '-_' else '_' for c in key)
+    return os.path.join(CACHE_DIR, f"{safe_key}{suffix}")
+
+
+@contextmanager
+def _locked(key, exclusive=False):
+    """Hold a per-dataset lock so concurrent labops processes never interleave writes"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_path(key, '.lock'), 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _atomic_write(path, write, mode='w'):
+    """Write a file via a temp file + rename so readers never see a torn file"""
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _read_json(path):
+    """Read a JSON file, returning None if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _dump_pickle(data, f):
+    f.write(PICKLE_HEADER)
+    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_pickle(f):
+    if f.read(len(PICKLE_HEADER)) != PICKLE_HEADER:
+        raise ValueError("unsupported cache snapshot version")
+    # Only unpickle files we wrote ourselves - the cache lives in a shared temp dir
+    if hasattr(os, 'getuid') and os.fstat(f.fileno()).st_uid != os.getuid():
+        raise ValueError("cache snapshot not owned by current user")
+    return pickle.load(f)
+
+
+# format name -> (payload suffix, file mode suffix, dump, load)
+_SERIALIZERS = {
+    'json': ('.json', '', json.dump, json.load),
+    'pickle': ('.pickle', 'b', _dump_pickle, _load_pickle),
+}
+if msgpack:
+    _SERIALIZERS['msgpack'] = (
+        '.msgpack', 'b',
+        lambda data, f: msgpack.pack(data, f),
+        lambda f: msgpack.unpack(f, raw=False),
+    )
+
+
+def _write_format():
+    """Format used for new writes - unknown or unavailable formats fall back to JSON"""
+    return CACHE_FORMAT if CACHE_FORMAT in _SERIALIZERS else 'json'
+
+
+def _read_payload(key, fmt):
+    """Read a payload in the given format, returning None if it is missing or unreadable"""
+    if fmt not in _SERIALIZERS:
+        return None
+    suffix, mode, _, load_payload = _SERIALIZERS[fmt]
+    # Building tens of thousands of dicts triggers repeated GC passes that find nothing to free
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(_path(key, suffix), 'r' + mode) as f:
+            return load_payload(f)
+    except Exception:
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _generation(meta):
+    """Identifies the payload a metadata record points at; unchanged when only the timestamp is touched"""
+    return meta.get('generation', meta.get('time', 0))
+
+
+def load_meta(key):
+    """Load only the small metadata record (timestamp, sync state) for a dataset"""
+    try:
+        with _locked(key):
+            return _read_json(_path(key, '.meta.json')) or {}
+    except OSError:
+        return {}
+
+
+def datasets():
+    """Names of every dataset with metadata in the cache directory"""
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return []
+    return sorted(name[:-len('.meta.json')] for name in names if name.endswith('.meta.json'))
+
+
+def stat(key):
+    """Metadata plus on-disk size in bytes for a dataset, or None if it isn't cached"""
+    meta = load_meta(key)
+    if not meta:
+        return None
+    suffix = _SERIALIZERS.get(meta.get('format', 'json'), _SERIALIZERS['json'])[0]
+    try:
+        size = os.path.getsize(_path(key, suffix))
+    except OSError:
+        size = 0
+    return {**meta, 'size': size}
+
+
+def mark_read(key):
+    """Record that a command read a dataset, so cache warming can skip ones nobody uses"""
+    path = _path(key, '.read')
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            open(path, 'a').close()
+        except OSError:
+            pass
+    except OSError:
+        pass
+
+
+def last_read(key):
+    """When mark_read() was last called for a dataset (0 if never)"""
+    try:
+        return os.path.getmtime(_path(key, '.read'))
+    except OSError:
+        return 0
+
+
+def claim(name, max_age):
+    """Take a marker file unless another process took it less than max_age seconds ago; True if taken"""
+    path = _path(name, '.claim')
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        try:
+            if time.time() - os.path.getmtime(path) < max_age:
+                return False
+            os.unlink(path)  # Left behind by a process that died
+        except FileNotFoundError:
+            pass
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except OSError:
+        return False
+
+
+def release(name):
+    """Drop a marker file taken with claim()"""
+    try:
+        os.unlink(_path(name, '.claim'))
+    except OSError:
+        pass
+
+
+def load(key):
+    """Load a single dataset, returning (data, timestamp) or (None, 0) on a miss"""
+    try:
+        with _locked(key):
+            meta = _read_json(_path(key, '.meta.json'))
+            if not meta:
+                return None, 0
+            timestamp = meta.get('time', 0)
+
+            # Long-lived processes (TUI) re-read only the metadata while the payload is unchanged
+            remembered = _memory.get(key)
+            if remembered and remembered[0] == _generation(meta):
+                return remembered[1], timestamp
+
+            data = _read_payload(key, meta.get('format', 'json'))
+    except OSError:
+        return None, 0
+
+    if data is None:
+        return None, 0
+    _memory[key] = (_generation(meta), data)
+    return data, timestamp
+
+
+def _save_unlocked(key, data, timestamp, meta=None):
+    """Write payload first, then metadata, so metadata never points at a missing payload"""
+    fmt = _write_format()
+    suffix, mode, dump_payload, _ = _SERIALIZERS[fmt]
+    _memory.pop(key, None)
+    _atomic_write(_path(key, suffix), lambda f: dump_payload(data, f), 'w' + mode)
+    _commit_meta(key, timestamp, fmt, meta)
+    _memory[key] = (timestamp, data)
+
+
+def _commit_meta(key, timestamp, fmt, meta=None):
+    """Point the metadata at a freshly written payload and drop payloads in other formats"""
+    record = {**(meta or {}), 'key': key, 'time': timestamp, 'generation': timestamp, 'format': fmt}
+    _atomic_write(_path(key, '.meta.json'), lambda f: json.dump(record, f))
+    for other, (other_suffix, *_) in _SERIALIZERS.items():
+        if other != fmt:
+            try:
+                os.unlink(_path(key, other_suffix))
+            except OSError:
+                pass
+
+
+def save(key, data, timestamp, meta=None):
+    """Atomically replace a single dataset; meta holds extra fields such as sync state"""
+    try:
+        with _locked(key, exclusive=True):
+            _save_unlocked(key, data, timestamp, meta)
+    except Exception:
+        pass  # Fail silently if can't write cache
+
+
+def touch(key, timestamp):
+    """Mark a cached dataset as fresh again without rewriting its payload (e.g. after a 304)"""
+    try:
+        with _locked(key, exclusive=True):
+            meta = _read_json(_path(key, '.meta.json'))
+            if meta:
+                meta['time'] = timestamp
+                _atomic_write(_path(key, '.meta.json'), lambda f: json.dump(meta, f))
+    except Exception:
+        pass  # Fail silently if can't write cache
+
+
+def update(key, func, timestamp):
+    """Read-modify-write a dataset under one exclusive lock; func receives the current data or None"""
+    try:
+        with _locked(key, exclusive=True):
+            meta = _read_json(_path(key, '.meta.json'))
+            remembered = _memory.get(key)
+            if meta and remembered and remembered[0] == _generation(meta):
+                data = remembered[1]
+            else:
+                data = _read_payload(key, meta.get('format', 'json')) if meta else None
+            _save_unlocked(key, func(data), timestamp)
+    except Exception:
+        pass  # Fail silently if can't write cache
+
+
+def remember(key, data, timestamp):
+    """Keep data just written by save_stream() in memory, so this process doesn't read it back"""
+    if _generation(load_meta(key)) == timestamp:
+        _memory[key] = (timestamp, data)
+
+
+def save_stream(key, items, timestamp, meta=None):
+    """Pass items through while writing them as {"response": [...]} in the configured format.
+
+    The dataset is only replaced once items are exhausted, so an interrupted
+    download never leaves a partial cache. Cache write errors are swallowed;
+    the items keep flowing either way.
+    """
+    _memory.pop(key, None)
+    if _write_format() != 'json':
+        # Pickle and msgpack write one document, so save once every item is in
+        collected = []
+        for item in items:
+            collected.append(item)
+            yield item
+        save(key, {'response': collected}, timestamp, meta)
+        return
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix='.tmp-')
+        f = os.fdopen(fd, 'w')
+        f.write('{"response": [')
+    except Exception:
+        yield from items  # Can't write cache - just stream
+        return
+
+    committed = False
+    try:
+        for i, item in enumerate(items):
+            if f is not None:
+                try:
+                    f.write(',' if i else '')
+                    f.write(json.dumps(item))  # dumps() runs the C encoder; dump() streams in Python
+                except Exception:
+                    f.close()
+                    f = None
+            yield item
+
+        if f is not None:
+            try:
+                f.write(']}')
+                f.close()
+                f = None
+                with _locked(key, exclusive=True):
+                    os.replace(tmp_path, _path(key, '.json'))
+                    _commit_meta(key, timestamp, 'json', meta)
+                committed = True
+            except OSError:
+                pass  # Fail silently if can't write cache; errors from items still propagate
+    finally:
+        if f is not None:
+            f.close()
+        if not committed:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
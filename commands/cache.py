@@ -0,0 +1,145 @@
+import time
+import click
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style, init
+import api_client
+import cache_store
+from api_client import (CACHE_DURATION, DEFAULT_LOCATION, SITES_CACHE_DURATION, STALE_WINDOW, get_host_index,
+                        get_k2_ips, k2_cache_summary, shard_params, warmable_datasets)
+
+init()
+
+WARM_MARGIN = 120  # Daemon refreshes datasets this many seconds before they expire
+WARM_MIN_SLEEP = 10  # Shortest daemon sleep between checks, in seconds
+
+
+def _format_age(seconds):
+    seconds = int(max(seconds, 0))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _run_jobs(jobs):
+    """Refresh datasets in parallel, printing one line per dataset as it finishes"""
+    def run(job):
+        label, refresh = job
+        start = time.time()
+        try:
+            count = refresh()
+            return f"{Fore.GREEN}✓{Style.RESET_ALL} {label}: {count} records in {time.time() - start:.1f}s"
+        except Exception as e:
+            return f"{Fore.RED}✗{Style.RESET_ALL} {label}: {e}"
+
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as executor:
+        for line in executor.map(run, jobs):
+            click.echo(line)
+
+
+def _warm_k2():
+    """Resolve K2 IPs for every host in the default location; only uncached IDs hit /interfaces"""
+    start = time.time()
+    hosts = get_host_index(shard_params(DEFAULT_LOCATION)).filter(location=DEFAULT_LOCATION)
+    k2_ips = get_k2_ips([host.get('hardwareid') for host in hosts])
+    found = sum(1 for ip in k2_ips.values() if ip)
+    click.echo(f"{Fore.GREEN}✓{Style.RESET_ALL} interfaces: {found} of {len(k2_ips)} K2 IPs in {time.time() - start:.1f}s")
+
+
+def _expires_in(key, now):
+    """Seconds until a dataset expires (0 if it already has or was never cached)"""
+    cached_at = cache_store.load_meta(key).get('time', 0)
+    return max(0, cached_at + CACHE_DURATION - now)
+
+
+def due_datasets(now):
+    """(all warmable datasets, those within WARM_MARGIN seconds of expiring)"""
+    jobs = warmable_datasets()
+    return jobs, [job for job in jobs if _expires_in(job[0], now) <= WARM_MARGIN]
+
+
+def seconds_until_due(jobs):
+    """How long to sleep before the next dataset enters its refresh window"""
+    now = time.time()
+    return max(WARM_MIN_SLEEP, min(_expires_in(job[0], now) for job in jobs) - WARM_MARGIN)
+
+
+def warm_cache(k2=False, only=()):
+    """
+    Refresh hosts (and every filter set read recently) and switches in parallel, then optionally K2 interfaces.
+    With only, just the datasets with those cache keys are refreshed.
+    """
+    api_client.SHOW_PROGRESS = False  # Parallel fetches would draw over each other's timer
+    jobs = [job for job in warmable_datasets() if not only or job[0] in only]
+    try:
+        _run_jobs(jobs)
+        if k2:
+            _warm_k2()
+    finally:
+        for key in {job[0] for job in jobs} | set(only):
+            cache_store.release(f"revalidate-{key}")  # Let the next stale read start a background refresh
+
+
+def run_daemon(k2=False):
+    """Keep the cache warm: refresh each dataset WARM_MARGIN seconds before it expires, until interrupted"""
+    api_client.SHOW_PROGRESS = False
+    click.echo(f"Keeping the cache warm (TTL {CACHE_DURATION}s, refresh {WARM_MARGIN}s before expiry). Ctrl+C to stop.")
+    try:
+        while True:
+            jobs, due = due_datasets(time.time())
+            if due:
+                click.echo(time.strftime('[%H:%M:%S]'), nl=False)
+                click.echo(f" refreshing {', '.join(job[0] for job in due)}")
+                _run_jobs(due)
+                if k2:
+                    _warm_k2()
+
+            time.sleep(seconds_until_due(jobs))
+    except KeyboardInterrupt:
+        click.echo("Stopped.")
+
+
+def cache_status():
+    """Show age, freshness and size for every cached dataset"""
+    keys = cache_store.datasets()
+    if not keys:
+        click.echo(f"Cache is empty ({cache_store.CACHE_DIR})")
+        return
+
+    now = time.time()
+    header = f"{'Dataset':<44}{'Age':<12}{'State':<10}{'Format':<9}{'Size':>10}"
+    click.echo(f"{Fore.CYAN}{header}{Style.RESET_ALL}")
+    click.echo("-" * len(header))
+    total_size = 0
+    for key in keys:
+        info = cache_store.stat(key)
+        if not info:
+            continue
+        total_size += info['size']
+        age = now - info.get('time', 0)
+        # The site list is kept for a day and refetched once expired, never served stale
+        duration, stale_window = (SITES_CACHE_DURATION, 0) if key == 'sites' else (CACHE_DURATION, STALE_WINDOW)
+
+        if key == 'interfaces':
+            # Entries expire individually - report how many can still be served
+            state = "{}/{}".format(*k2_cache_summary())
+        elif age < duration:
+            state = f"{Fore.GREEN}{'fresh':<10}{Style.RESET_ALL}"
+        elif age < duration + stale_window:
+            # Still served, with a background refresh
+            state = f"{Fore.YELLOW}{'stale':<10}{Style.RESET_ALL}"
+        else:
+            state = f"{Fore.RED}{'expired':<10}{Style.RESET_ALL}"
+
+        click.echo(f"{info.get('key', key):<44}{_format_age(age):<12}{state:<10}{info.get('format', 'json'):<9}{_format_size(info['size']):>10}")
+
+    click.echo(f"\n{Fore.CYAN}Cache directory{Style.RESET_ALL}: {cache_store.CACHE_DIR} ({_format_size(total_size)})")
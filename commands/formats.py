@@ -0,0 +1,117 @@
+# Machine-readable output: flat rows written one at a time, with no ANSI codes
+import csv
+import json
+import click
+
+OUTPUT_FORMATS = ['text', 'ndjson', 'csv', 'json']
+
+HOST_FIELDS = ['assetid', 'hardwareid', 'hostname', 'status', 'platform', 'manufacturer',
+               'usagetype', 'hostclass', 'location', 'rack', 'lab', 'vlanid', 'subnet',
+               'con_ip', 'lan_ip', 'checkout_owner', 'hwmon_timestamp']
+RACK_FIELDS = ['position', 'lab', 'host_count', 'vlanid', 'subnet', 'status_counts']
+RACK_HOST_FIELDS = ['position', 'assetid', 'hardwareid', 'platform', 'status', 'location',
+                    'con_ip', 'k2_ip', 'lan_ip']
+
+
+def host_row(host):
+    """Flatten a /hosts record into a single-level row"""
+    rack = host.get('serverrack') or {}
+    vlan = rack.get('consolevlan') or {}
+    return {
+        'assetid': host.get('assetid'),
+        'hardwareid': host.get('hardwareid'),
+        'hostname': host.get('hostname'),
+        'status': (host.get('status') or {}).get('status'),
+        'platform': host.get('platform'),
+        'manufacturer': host.get('manufacturer'),
+        'usagetype': (host.get('usagetype') or {}).get('usagetype'),
+        'hostclass': host.get('hostclass'),
+        'location': host.get('location'),
+        'rack': rack.get('position'),
+        'lab': rack.get('lab'),
+        'vlanid': vlan.get('vlanid'),
+        'subnet': vlan.get('subnet'),
+        'con_ip': host.get('con_ip'),
+        'lan_ip': host.get('lan_ip'),
+        'checkout_owner': host.get('checkout_owner'),
+        'hwmon_timestamp': host.get('hwmon_timestamp'),
+    }
+
+
+def status_counts(rack):
+    """Host count per status for a rack summary record"""
+    if 'status_counts' in rack:
+        return rack['status_counts']  # Precomputed by get_racks()
+    counts = {}
+    for host in rack.get('hosts') or []:
+        status = host.get('status') or 'Unknown'
+        counts[status] = counts.get(status, 0) + 1
+    return dict(sorted(counts.items()))
+
+
+def rack_row(rack):
+    """Flatten a rack summary record; status_counts stays a mapping (a JSON string in CSV)"""
+    vlan = rack.get('consolevlan') or {}
+    return {
+        'position': rack.get('position'),
+        'lab': rack.get('lab'),
+        'host_count': rack.get('host_count'),
+        'vlanid': vlan.get('vlanid'),
+        'subnet': vlan.get('subnet'),
+        'status_counts': status_counts(rack),
+    }
+
+
+def rack_host_row(position, host, k2_ip=None):
+    """One row per host in a rack, including its K2 IP"""
+    return {
+        'position': position,
+        'assetid': host.get('assetid'),
+        'hardwareid': host.get('hardwareid'),
+        'platform': host.get('platform'),
+        'status': host.get('status'),
+        'location': host.get('location'),
+        'con_ip': host.get('con_ip'),
+        'k2_ip': k2_ip,
+        'lan_ip': host.get('lan_ip'),
+    }
+
+
+class _EchoStream:
+    """File-like adapter so csv.writer goes through click.echo"""
+
+    def write(self, text):
+        click.echo(text, nl=False)
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(',', ':'))
+    return '' if value is None else value
+
+
+def write_rows(rows, output_format, fields):
+    """
+    Write rows to stdout as each one is produced, never holding the rendered output.
+
+    ndjson writes one object per line, csv a header and one line per row, and json a
+    compact array. Returns the number of rows written.
+    """
+    count = 0
+    if output_format == 'csv':
+        writer = csv.writer(_EchoStream(), lineterminator='\n')
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([_csv_value(row.get(field)) for field in fields])
+            count += 1
+    elif output_format == 'json':
+        click.echo('[', nl=False)
+        for row in rows:
+            click.echo((',' if count else '') + json.dumps(row, separators=(',', ':')), nl=False)
+            count += 1
+        click.echo(']')
+    else:
+        for row in rows:
+            click.echo(json.dumps(row, separators=(',', ':')))
+            count += 1
+    return count
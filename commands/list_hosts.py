@@ -3,12 +3,29 @@
 import click
 from datetime import datetime
 from colorama import Fore, Style, init
-from api_client import get_hosts
+from api_client import get_hosts, iter_hosts
 from commands.lookup import format_host_data
+from commands.formats import write_rows, host_row, HOST_FIELDS
 
 init()
 
 #Display and presentation (UI logic)
+def _host_blocks(hosts):
+    """Yield the text block for each host as it is produced"""
+    for host in hosts:
+        if not isinstance(host, dict):
+            continue
+
+        # Use the same detailed formatting as format_host_data()
+        yield format_host_data(host)
+        yield "-" * 50  # Separator between hosts
+        yield ""
+
+def _count_footer(shown_count, total_available):
+    if shown_count < total_available:
+        return f"{Fore.CYAN}Showing: {Fore.WHITE}{shown_count}{Fore.CYAN} of {Fore.WHITE}{total_available}{Fore.CYAN} total hosts{Style.RESET_ALL}"
+    return f"{Fore.CYAN}Total Hosts: {Fore.WHITE}{shown_count}{Style.RESET_ALL}"
+
 def format_hosts_list(hosts_data):
     # Extract hosts from response wrapper
     if isinstance(hosts_data, dict) and 'response' in hosts_data:
@@ -20,46 +37,55 @@ def format_hosts_list(hosts_data):
         shown_count = len(hosts)
         total_available = shown_count
 
-    output = []
-
-    for host in hosts:
-        if not isinstance(host, dict):
-            continue
-
-        # Use the same detailed formatting as format_host_data()
-        formatted_host = format_host_data(host)
-        output.append(formatted_host)
-        output.append("-" * 50)  # Separator between hosts
-        output.append("")
+    output = list(_host_blocks(hosts))
 
     # Add count at the bottom
-    if shown_count < total_available:
-        output.append(f"{Fore.CYAN}Showing: {Fore.WHITE}{shown_count}{Fore.CYAN} of {Fore.WHITE}{total_available}{Fore.CYAN} total hosts{Style.RESET_ALL}")
-    else:
-        output.append(f"{Fore.CYAN}Total Hosts: {Fore.WHITE}{shown_count}{Style.RESET_ALL}")
+    output.append(_count_footer(shown_count, total_available))
 
     return "\n".join(output)
 
+def _take(hosts, limit, counts):
+    """Yield up to limit hosts but keep consuming, so the total is known and a streamed download completes"""
+    for host in hosts:
+        counts['total'] += 1
+        if not limit or limit <= 0 or counts['shown'] < limit:
+            counts['shown'] += 1
+            yield host
+
 
 
 def list_hosts(status=None, platform=None, hostname=None,
                usagetype=None, location=None,
-               checkout_owner=None, bmc=False, no_bmc=False, limit=None, search_all=False):
+               checkout_owner=None, bmc=False, no_bmc=False, limit=None, search_all=False,
+               output_format='text'):
     """
-    Retrieve and display host information from the API in formatted output.72
+    Retrieve and display host information from the API, printing each host as it is produced.
+
+    output_format is "text" (colored blocks) or one of the machine-readable formats in commands.formats.
     """
-    hosts = get_hosts(
-        status=status,
-        platform=platform,
-        hostname=hostname,
-        usagetype=usagetype,
-        location=location,
-        checkout_owner=checkout_owner,
-        bmc=bmc,
-        no_bmc=no_bmc,
-        limit=limit,
-        search_all=search_all
-    )
-
-    formatted_output = format_hosts_list(hosts)
-    click.echo(formatted_output)
+    if platform or hostname or usagetype or checkout_owner or search_all:
+        # Fuzzy matching needs the full candidate set up front
+        hosts = get_hosts(
+            status=status,
+            platform=platform,
+            hostname=hostname,
+            usagetype=usagetype,
+            location=location,
+            checkout_owner=checkout_owner,
+            bmc=bmc,
+            no_bmc=no_bmc,
+            search_all=search_all
+        )['response']
+    else:
+        hosts = iter_hosts(status=status, location=location, bmc=bmc, no_bmc=no_bmc)
+
+    counts = {'shown': 0, 'total': 0}
+    hosts = _take(hosts, limit, counts)
+
+    if output_format != 'text':
+        write_rows((host_row(host) for host in hosts), output_format, HOST_FIELDS)
+        return
+
+    for block in _host_blocks(hosts):
+        click.echo(block)
+    click.echo(_count_footer(counts['shown'], counts['total']))
@@ -1,6 +1,7 @@
 import click
 from colorama import Fore, Style, init
 from api_client import get_racks
+from commands.formats import write_rows, rack_row, status_counts, RACK_FIELDS
 
 init()
 
@@ -32,12 +33,7 @@ def format_rack_data(rack):
         output.append("")
         output.append(f"{Fore.CYAN}Hosts by Status{Style.RESET_ALL}:")
         
-        status_counts = {}
-        for host in rack['hosts']:
-            status = host.get('status', 'Unknown')
-            status_counts[status] = status_counts.get(status, 0) + 1
-        
-        for status, count in sorted(status_counts.items()):
+        for status, count in status_counts(rack).items():
             output.append(f"  {Fore.CYAN}{status}{Style.RESET_ALL}: {Fore.WHITE}{count}{Style.RESET_ALL}")
     
     return "\n".join(output)
@@ -61,9 +57,9 @@ def format_racks_list(racks_data):
     
     return "\n".join(output)
 
-def list_racks(position=None, limit=None):
+def list_racks(position=None, limit=None, output_format='text'):
     """
-    Retrieve and display rack information from the API in formatted output.
+    Retrieve and display rack information from the API, printing each rack as it is formatted.
     """
     racks = get_racks()
     
@@ -74,10 +70,15 @@ def list_racks(position=None, limit=None):
     racks.sort(key=lambda x: x.get('position', ''))
     
     # Apply limit if specified
-    total_count = len(racks)
     if limit and limit > 0:
         racks = racks[:limit]
-    
-    formatted_output = format_racks_list(racks)
-    click.echo(formatted_output)
 
+    if output_format != 'text':
+        write_rows((rack_row(rack) for rack in racks), output_format, RACK_FIELDS)
+        return
+
+    for rack in racks:
+        click.echo(format_rack_data(rack))
+        click.echo("-" * 50)  # Separator between racks
+        click.echo("")
+    click.echo(f"{Fore.CYAN}Total Racks: {Fore.WHITE}{len(racks)}{Style.RESET_ALL}")
@@ -1,10 +1,20 @@
 import click
+import codecs
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from colorama import Fore, Style, init
-from api_client import get_hosts, get_host_by_asset_id, get_host_by_hardware_id, get_k2_ip
+from api_client import cache_k2_ips, get_host_with_k2, get_k2_ip
 
 init()  # Initialize colorama
 
+BULK_LOOKUP_WORKERS = 8  # Concurrent lookups for bulk mode
+
+def is_hardware_id(host_id):
+    """Hardware IDs contain dots or letters (e.g. SNX.HMBLT21N062500123); asset IDs are numeric"""
+    return '.' in host_id or any(c.isalpha() for c in host_id)
+
 def format_host_data(data):
     output = []
 
@@ -89,8 +99,8 @@ def format_host_data(data):
 
     return "\n".join(output)
 
-def format_host_data_with_k2(data):
-    """Format host data with K2 IP lookup for individual host lookups"""
+def format_host_data_with_k2(data, k2_ip=None):
+    """Format host data with K2 IP lookup for individual host lookups (skipped if k2_ip is given)"""
     output = []
 
     # Key info first
@@ -116,8 +126,7 @@ def format_host_data_with_k2(data):
     output.append("")  # Spacing
 
     # Network info - get K2 IP if hardware ID is available
-    k2_ip = None
-    if data.get('hardwareid'):
+    if k2_ip is None and data.get('hardwareid'):
         k2_ip = get_k2_ip(data['hardwareid'])
     
     if data.get('con_ip'):
@@ -184,30 +193,86 @@ def lookup_host(asset_id: str = None, hardware_id: str = None):
     """
     Find a host by asset_id or hardware_id and display its details in pretty format.
     """
-    if hardware_id:
-        try:
-            # First get basic info from hardware ID
-            hw_result = get_host_by_hardware_id(hardware_id)
-            hw_data = hw_result.get('response', hw_result)
-
-            # Extract asset ID and get full details
-            if hw_data.get('assetid'):
-                full_result = get_host_by_asset_id(hw_data['assetid'])
-                display_data = full_result.get('response', full_result)
-            else:
-                # Fallback to hardware ID data if no asset ID
-                display_data = hw_data
-
-            formatted_output = format_host_data_with_k2(display_data)
-            click.echo(formatted_output)
-        except Exception as e:
+    try:
+        # Served from the hosts cache when fresh; otherwise K2 is fetched alongside the host details
+        display_data, k2_ip = get_host_with_k2(asset_id=asset_id, hardware_id=hardware_id)
+        formatted_output = format_host_data_with_k2(display_data, k2_ip)
+        click.echo(formatted_output)
+    except Exception as e:
+        if hardware_id:
             click.echo(f'{{"error": "Hardware ID {hardware_id} not found: {str(e)}"}}')
-        return
+        else:
+            click.echo(f'{{"error": "Asset ID {asset_id} not found: {str(e)}"}}')
 
+def _lookup_record(query, pending=None):
+    """Resolve one ID into a flat result record (never raises); pending collects fetched K2 IPs"""
     try:
-        result = get_host_by_asset_id(asset_id)
-        display_data = result.get('response', result)
-        formatted_output = format_host_data_with_k2(display_data)
-        click.echo(formatted_output)
+        if is_hardware_id(query):
+            host, k2_ip = get_host_with_k2(hardware_id=query, pending=pending)
+        else:
+            host, k2_ip = get_host_with_k2(asset_id=query, pending=pending)
     except Exception as e:
-        click.echo(f'{{"error": "Asset ID {asset_id} not found: {str(e)}"}}')
+        return {'query': query, 'error': str(e)}
+
+    return {
+        'query': query,
+        'assetid': host.get('assetid'),
+        'hardwareid': host.get('hardwareid'),
+        'status': (host.get('status') or {}).get('status'),
+        'platform': host.get('platform'),
+        'location': host.get('location'),
+        'con_ip': host.get('con_ip'),
+        'k2_ip': k2_ip,
+        'lan_ip': host.get('lan_ip'),
+    }
+
+def _format_lookup_row(record):
+    """One table row for a bulk lookup result"""
+    if record.get('error'):
+        return f"{Fore.RED}{record['query'][:21]:<22}NOT FOUND{Style.RESET_ALL}"
+    columns = [record['query'], record['assetid'], record['hardwareid'], record['status'],
+               record['platform'], record['con_ip'], record['k2_ip']]
+    widths = [22, 12, 22, 14, 15, 16, 16]
+    cells = [f"{str(value or 'N/A')[:width - 1]:<{width}}" for value, width in zip(columns, widths)]
+    return f"{Fore.WHITE}{''.join(cells)}{Style.RESET_ALL}"
+
+def decode_ids(data):
+    """Text of an ID list from raw bytes, honoring a UTF-16 BOM (PowerShell redirection) or a UTF-8 one"""
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return data.decode('utf-16')
+    return data.decode('utf-8-sig')
+
+def read_ids(lines):
+    """IDs from a file or stdin: one per line, blank lines and # comments skipped, duplicates dropped"""
+    ids = (line.split('#', 1)[0].strip() for line in lines)
+    return list(dict.fromkeys(i for i in ids if i))
+
+def bulk_lookup(ids, output_format='table', workers=BULK_LOOKUP_WORKERS):
+    """
+    Resolve many asset/hardware IDs concurrently, printing each result as soon as it completes.
+    K2 IPs fetched along the way are cached in one write at the end.
+    """
+    start_time = time.time()
+    if output_format == 'table':
+        header = f"{'Query':<22}{'Asset ID':<12}{'Hardware ID':<22}{'Status':<14}{'Platform':<15}{'BMC IP':<16}{'K2 IP':<16}"
+        click.echo(f"{Fore.CYAN}{header}{Style.RESET_ALL}")
+        click.echo("-" * len(header))
+
+    found = 0
+    pending = {}  # Hardware ID -> K2 IP fetched by this run, not yet cached
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(_lookup_record, query, pending) for query in ids]
+            for future in as_completed(futures):
+                record = future.result()
+                found += 0 if record.get('error') else 1
+                if output_format == 'ndjson':
+                    click.echo(json.dumps(record))
+                else:
+                    click.echo(_format_lookup_row(record))
+    finally:
+        if pending:
+            cache_k2_ips(pending)
+
+    elapsed = time.time() - start_time
+    click.echo(f"Resolved {found} of {len(ids)} IDs in {elapsed:.1f}s", err=True)
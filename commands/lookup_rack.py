@@ -1,10 +1,11 @@
 import click
 from colorama import Fore, Style, init
-from api_client import get_rack_by_position, get_k2_ip
+from api_client import get_rack_by_position, get_k2_ips
+from commands.formats import write_rows, rack_host_row, RACK_HOST_FIELDS
 
 init()
 
-def format_rack_data(rack):
+def format_rack_data(rack, use_cache=True):
     """Format a single rack's detailed data for display"""
     output = []
     
@@ -39,6 +40,9 @@ def format_rack_data(rack):
         output.append(header)
         output.append("-" * 92)
         
+        # Resolve all K2 IPs up front in parallel instead of one request per row
+        k2_ips = get_k2_ips([host.get('hardwareid') for host in hosts if isinstance(host, dict)], use_cache=use_cache)
+        
         # Table rows
         for host in hosts:
             if not isinstance(host, dict):
@@ -52,17 +56,24 @@ def format_rack_data(rack):
             
             # Get K2 IP if hardware ID is available
             k2_ip = 'N/A'
-            if host.get('hardwareid'):
-                k2_result = get_k2_ip(host.get('hardwareid'))
-                if k2_result:
-                    k2_ip = k2_result[:14]  # Truncate if too long
+            k2_result = k2_ips.get(host.get('hardwareid'))
+            if k2_result:
+                k2_ip = k2_result[:14]  # Truncate if too long
             
             row = f"{Fore.WHITE}{assetid:<12} {hardwareid:<20} {platform:<15} {con_ip:<15} {k2_ip:<15} {lan_ip:<15}{Style.RESET_ALL}"
             output.append(row)
     
     return "\n".join(output)
 
-def lookup_rack(position):
+def _rack_host_rows(rack, use_cache=True):
+    """Machine-readable rows for every host in a rack, sorted by location"""
+    hosts = sorted((h for h in rack.get('hosts') or [] if isinstance(h, dict)),
+                   key=lambda x: x.get('location') or '')
+    k2_ips = get_k2_ips([host.get('hardwareid') for host in hosts], use_cache=use_cache)
+    for host in hosts:
+        yield rack_host_row(rack.get('position'), host, k2_ips.get(host.get('hardwareid')))
+
+def lookup_rack(position, use_cache=True, output_format='text'):
     """Find a rack by position and display its details"""
     try:
         # First try exact match
@@ -74,8 +85,10 @@ def lookup_rack(position):
             rack_only = '.'.join(position.split('.')[:-1])
             rack = get_rack_by_position(rack_only)
         
-        if rack:
-            formatted_output = format_rack_data(rack)
+        if rack and output_format != 'text':
+            write_rows(_rack_host_rows(rack, use_cache=use_cache), output_format, RACK_HOST_FIELDS)
+        elif rack:
+            formatted_output = format_rack_data(rack, use_cache=use_cache)
             click.echo(formatted_output)
         else:
             click.echo(f'{{"error": "Rack position {position} not found"}}')
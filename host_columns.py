@@ -0,0 +1,132 @@
+# Columnar view of a hosts snapshot: dictionary-encoded categorical columns in compact arrays
+import gc
+import importlib.util
+from array import array
+from collections import Counter
+
+from host_index import has_bmc, rack_position, room_name
+
+# Raw location is left out: it includes the U position, so nearly every host has its own value
+COLUMNS = ['status', 'platform', 'site', 'room', 'rack', 'lab', 'usagetype', 'manufacturer', 'bmc']
+# Counting and filtering use NumPy when it is installed (imported on first use), else C-level Counter/array loops
+USE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+def _host_values(host):
+    """One value per column (None when missing or empty) for a /hosts record"""
+    location = host.get('location')
+    position = rack_position(host)
+    return (
+        (host.get('status') or {}).get('status') or None,
+        host.get('platform') or None,
+        location.upper().split('.')[0] if location else None,  # Same site key as HostIndex.by_site
+        room_name(position) if position else None,
+        position,
+        (host.get('serverrack') or {}).get('lab') or None,
+        (host.get('usagetype') or {}).get('usagetype') or None,
+        host.get('manufacturer') or None,
+        has_bmc(host),
+    )
+
+
+class HostColumns:
+    """Dictionary-encoded columns over one hosts snapshot.
+
+    ``codes[column]`` is an ``array('I')`` holding one code per row, and
+    ``values[column][code]`` the value it stands for (None when missing). Each
+    distinct string is stored once, and counts and filters work on the codes.
+    Rows number the host records only; anything else in the payload is skipped.
+    """
+
+    def __init__(self, hosts):
+        hosts = [host for host in hosts if isinstance(host, dict)]
+        self.hosts = hosts
+        codes = [array('I') for _ in COLUMNS]
+        encodings = [{} for _ in COLUMNS]  # Per column: value -> code
+        # Same reason as cache_store.load: no garbage here, only needless GC passes over the hosts
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for host in hosts:
+                for column_codes, encoding, value in zip(codes, encodings, _host_values(host)):
+                    code = encoding.get(value)
+                    if code is None:
+                        code = encoding[value] = len(encoding)
+                    column_codes.append(code)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        self.codes = dict(zip(COLUMNS, codes))
+        self.values = {column: list(encoding) for column, encoding in zip(COLUMNS, encodings)}
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def _named(self, column, missing):
+        values = self.values[column]
+        return values if missing is None else [missing if value is None else value for value in values]
+
+    def _np_codes(self, column, rows):
+        import numpy as np
+        codes = np.frombuffer(self.codes[column], dtype=np.uint32)
+        return codes if rows is None else codes[np.asarray(rows, dtype=np.intp)]
+
+    def counts(self, column, rows=None, missing=None):
+        """Value -> number of rows (all rows, or only the given row numbers); missing values count as `missing`"""
+        values = self._named(column, missing)
+        if USE_NUMPY:
+            import numpy as np
+            totals = np.bincount(self._np_codes(column, rows), minlength=len(values)).tolist()
+            counted = ((code, count) for code, count in enumerate(totals) if count)
+        else:
+            codes = self.codes[column]
+            counted = (Counter(codes) if rows is None else Counter(map(codes.__getitem__, rows))).items()
+        result = {}
+        for code, count in counted:
+            result[values[code]] = result.get(values[code], 0) + count
+        return result
+
+    def crosstab(self, column, by, rows=None, missing=None):
+        """Value of column -> {value of by -> number of rows}; missing values count as `missing`"""
+        values, by_values = self._named(column, missing), self._named(by, missing)
+        table = {}
+        if USE_NUMPY:
+            import numpy as np
+            width = len(by_values)
+            pairs = self._np_codes(column, rows).astype(np.int64) * width + self._np_codes(by, rows)
+            totals = np.bincount(pairs, minlength=len(values) * width).tolist()
+            counted = ((divmod(pair, width), count) for pair, count in enumerate(totals) if count)
+        else:
+            codes, by_codes = self.codes[column], self.codes[by]
+            if rows is None:
+                counted = Counter(zip(codes, by_codes)).items()
+            else:
+                counted = Counter(zip(map(codes.__getitem__, rows), map(by_codes.__getitem__, rows))).items()
+        for (code, by_code), count in counted:
+            row = table.setdefault(values[code], {})
+            row[by_values[by_code]] = row.get(by_values[by_code], 0) + count
+        return table
+
+    def where(self, column, predicate):
+        """Row numbers (ascending) whose value satisfies predicate, testing each distinct value once"""
+        matching = [code for code, value in enumerate(self.values[column]) if predicate(value)]
+        if USE_NUMPY:
+            import numpy as np
+            return np.flatnonzero(np.isin(self._np_codes(column, None), matching)).tolist()
+        matching = set(matching)
+        return [row for row, code in enumerate(self.codes[column]) if code in matching]
+
+    def where_location(self, prefix):
+        """
+        Rows whose location starts with prefix (case-insensitive), like HostIndex.filter;
+        None or "all" means every row. Narrowed on site codes, so only a prefix below
+        site level ("SEA85.161") checks the raw locations, and only that site's.
+        """
+        if not prefix or prefix.upper() == 'ALL':
+            return None
+        prefix = prefix.upper()
+        if '.' not in prefix:
+            return self.where('site', lambda site: site is not None and site.startswith(prefix))
+        site = prefix.split('.')[0]
+        return [row for row in self.where('site', lambda value: value == site)
+                if (self.hosts[row].get('location') or '').upper().startswith(prefix)]
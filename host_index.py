@@ -0,0 +1,147 @@
+# In-memory indexes over a loaded hosts dataset
+
+
+def rack_position(host):
+    """Rack position for a host: serverrack.position if set, otherwise the location up to the first whitespace"""
+    position = (host.get('serverrack') or {}).get('position')
+    if position:
+        return position.strip()
+    location = (host.get('location') or '').strip()
+    return location.split()[0] if location else None
+
+
+def room_name(position):
+    """Room for a rack position (e.g., SEA85.159.R6-L01 -> SEA85.159)"""
+    if '.' in position:
+        parts = position.split('.')
+        if len(parts) >= 2:
+            return f"{parts[0]}.{parts[1]}"  # SEA85.159
+        return parts[0]  # Fallback
+    return "Unknown"
+
+
+def has_bmc(host):
+    """True if the host has a usable console (BMC) IP"""
+    con_ip = host.get('con_ip')
+    return bool(con_ip and con_ip.strip())
+
+
+def host_matches(host, status=None, location=None, platform=None, bmc=False, no_bmc=False):
+    """Single-record version of HostIndex.filter, for hosts that are not indexed (e.g. while streaming)"""
+    if not isinstance(host, dict):
+        return False
+    if status and ((host.get('status') or {}).get('status') or '').lower() != status.lower():
+        return False
+    if platform and (host.get('platform') or '').lower() != platform.lower():
+        return False
+    if bmc and not has_bmc(host):
+        return False
+    if no_bmc and not bmc and has_bmc(host):
+        return False
+    if location and location.upper() != 'ALL':
+        if not (host.get('location') or '').upper().startswith(location.upper()):
+            return False
+    return True
+
+
+class HostIndex:
+    """Hash maps and posting lists over one hosts snapshot.
+
+    Posting lists hold row numbers into ``hosts`` in ascending order, so filtered
+    results keep the API's original ordering.
+    """
+
+    def __init__(self, hosts, generation=None):
+        self.hosts = hosts
+        self.generation = generation  # Cache timestamp of the snapshot this index was built from
+        self.by_assetid = {}
+        self.by_hardwareid = {}  # Lowercased hardware ID -> row
+        self.by_rack = {}  # Rack position -> rows
+        self.by_status = {}  # Lowercased status -> rows
+        self.by_platform = {}  # Lowercased platform -> rows
+        self.by_site = {}  # Uppercased first location segment (e.g. SEA85) -> rows
+        self.with_bmc = []
+        self.without_bmc = []
+
+        for row, host in enumerate(hosts):
+            if not isinstance(host, dict):
+                continue
+
+            if host.get('assetid'):
+                self.by_assetid.setdefault(str(host['assetid']).lower(), row)
+            if host.get('hardwareid'):
+                self.by_hardwareid.setdefault(str(host['hardwareid']).lower(), row)
+
+            position = rack_position(host)
+            if position:
+                self.by_rack.setdefault(position, []).append(row)
+
+            status = ((host.get('status') or {}).get('status') or '').lower()
+            self.by_status.setdefault(status, []).append(row)
+            self.by_platform.setdefault((host.get('platform') or '').lower(), []).append(row)
+
+            site = (host.get('location') or '').upper().split('.')[0]
+            self.by_site.setdefault(site, []).append(row)
+
+            (self.with_bmc if has_bmc(host) else self.without_bmc).append(row)
+
+    def find(self, query):
+        """Find a host by exact asset ID or hardware ID (case-insensitive)"""
+        key = str(query).strip().lower()
+        row = self.by_assetid.get(key)
+        if row is None:
+            row = self.by_hardwareid.get(key)
+        return self.hosts[row] if row is not None else None
+
+    def rack_hosts(self, position):
+        """All hosts whose rack position matches exactly"""
+        return [self.hosts[row] for row in self.by_rack.get(position, [])]
+
+    def _location_rows(self, prefix):
+        """Rows whose location starts with prefix (case-insensitive)"""
+        prefix = prefix.upper()
+        if '.' in prefix:
+            # Prefix pins down one site - only scan that site's hosts
+            site = prefix.split('.')[0]
+            return [row for row in self.by_site.get(site, [])
+                    if (self.hosts[row].get('location') or '').upper().startswith(prefix)]
+
+        rows = []
+        for site, site_rows in self.by_site.items():
+            if site.startswith(prefix):
+                rows.extend(site_rows)
+        return sorted(rows) if len(rows) > 1 else rows
+
+    def filter(self, status=None, location=None, platform=None, bmc=False, no_bmc=False):
+        """Return hosts matching every given predicate, in original order.
+
+        ``location`` is a case-insensitive prefix; None or "all" means every location.
+        """
+        # (posting list, per-host check) for each active predicate
+        predicates = []
+        if status:
+            status = status.lower()
+            predicates.append((self.by_status.get(status, []),
+                               lambda h: ((h.get('status') or {}).get('status') or '').lower() == status))
+        if platform:
+            platform = platform.lower()
+            predicates.append((self.by_platform.get(platform, []),
+                               lambda h: (h.get('platform') or '').lower() == platform))
+        if bmc:
+            predicates.append((self.with_bmc, has_bmc))
+        elif no_bmc:
+            predicates.append((self.without_bmc, lambda h: not has_bmc(h)))
+        if location and location.upper() != 'ALL':
+            prefix = location.upper()
+            predicates.append((self._location_rows(prefix),
+                               lambda h: (h.get('location') or '').upper().startswith(prefix)))
+
+        if not predicates:
+            return [host for host in self.hosts if isinstance(host, dict)]
+
+        # Walk the shortest posting list and check the rest per host, so cost is O(smallest result)
+        predicates.sort(key=lambda p: len(p[0]))
+        rows = predicates[0][0]
+        checks = [check for _, check in predicates[1:]]
+        hosts = (self.hosts[row] for row in rows)
+        return [host for host in hosts if all(check(host) for check in checks)]
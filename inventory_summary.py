@@ -0,0 +1,85 @@
+# Aggregation behind `labops summary`: every breakdown is a count or crosstab over HostColumns codes
+
+GROUP_BY_FIELDS = ['status', 'platform', 'room', 'lab', 'site', 'usagetype', 'manufacturer']  # HostColumns columns
+FILL_BUCKET = 10  # Width of the rack fill histogram buckets, in hosts
+
+
+def _ranked(counts):
+    """Counts sorted largest first, ties by name"""
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], str(item[0]))))
+
+
+def _coverage(bmc_counts):
+    """BMC coverage from a bmc column count ({True: n, False: m})"""
+    with_bmc = bmc_counts.get(True, 0)
+    total = with_bmc + bmc_counts.get(False, 0)
+    return {
+        'with_bmc': with_bmc,
+        'without_bmc': total - with_bmc,
+        'coverage_pct': round(100 * with_bmc / total, 1) if total else 0.0,
+    }
+
+
+def _fill_levels(rack_counts):
+    """Hosts-per-rack stats and a histogram of racks by host count"""
+    if not rack_counts:
+        return {'min': 0, 'max': 0, 'avg': 0.0}, {}
+    counts = sorted(rack_counts.values())
+    buckets = {}
+    for count in counts:
+        low = (count - 1) // FILL_BUCKET * FILL_BUCKET + 1
+        bucket = f"{low}-{low + FILL_BUCKET - 1}"
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+    stats = {'min': counts[0], 'max': counts[-1], 'avg': round(sum(counts) / len(counts), 1)}
+    return stats, buckets
+
+
+def summarize(columns, rows, switches, group_by=()):
+    """
+    Totals and breakdowns by status, platform, room and lab, BMC coverage, rack fill
+    levels and switch models, plus per-group stats for each group_by field.
+
+    ``rows`` selects the hosts of a HostColumns (None for all of them).
+    """
+    by_status = columns.counts('status', rows, missing='Unknown')
+    rack_counts = columns.counts('rack', rows)
+    rack_counts.pop(None, None)  # Hosts without rack info
+    per_rack, fill_levels = _fill_levels(rack_counts)
+
+    switch_models = {}
+    for switch in switches or []:
+        if isinstance(switch, dict) and switch.get('model'):
+            switch_models[switch['model']] = switch_models.get(switch['model'], 0) + 1
+
+    result = {
+        'hosts': {
+            'total': sum(by_status.values()),
+            'by_status': _ranked(by_status),
+            'by_platform': _ranked(columns.counts('platform', rows, missing='Unknown')),
+            'by_room': _ranked(columns.counts('room', rows, missing='Unknown')),
+            'by_lab': _ranked(columns.counts('lab', rows, missing='Unknown')),
+            'bmc': _coverage(columns.counts('bmc', rows)),
+        },
+        'racks': {
+            'total': len(rack_counts),
+            'hosts_per_rack': per_rack,
+            'fill_levels': dict(sorted(fill_levels.items(), key=lambda item: int(item[0].split('-')[0]))),
+        },
+        'switches': {
+            'total': len(switches or []),
+            'by_model': _ranked(switch_models),
+        },
+    }
+
+    groups = {}
+    for field in group_by:
+        statuses = columns.crosstab(field, 'status', rows, missing='Unknown')
+        bmc = columns.crosstab(field, 'bmc', rows, missing='Unknown')
+        groups[field] = {
+            value: {'total': sum(by.values()), 'bmc': _coverage(bmc[value]), 'by_status': _ranked(by)}
+            for value, by in sorted(statuses.items(), key=lambda item: -sum(item[1].values()))
+        }
+    if groups:
+        result['groups'] = groups
+    return result
+
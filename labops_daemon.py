@@ -0,0 +1,303 @@
+# Optional `labops serve` daemon: keeps hosts, switches, their indexes and the rack aggregation
+# in memory and runs CLI commands sent over a Unix domain socket.
+#
+# Protocol: the client sends one JSON line {"argv": [...], "tty": [stdout, stderr], "settings": hash};
+# the daemon answers with JSON lines {"o": text} (stdout), {"e": text} (stderr) and finally
+# {"exit": code}, or {"refused": reason} when the client must run the command itself.
+# The client side (forward) only needs os/json/socket/hashlib, so it stays cheap to import.
+# It only connects to a socket this user owns, in a directory nobody else can write to.
+import io
+import os
+import sys
+import json
+import stat
+import socket
+import hashlib
+
+import cache_store
+
+SOCKET_PATH = os.getenv("LABOPS_SOCKET") or os.path.join(cache_store.CACHE_DIR, 'labops.sock')
+DAEMON_DISABLED = os.getenv("LABOPS_NO_DAEMON", "").lower() in ("1", "true", "yes")
+CONNECT_TIMEOUT = 0.5  # Seconds to wait for the daemon to accept before running in-process
+
+# Commands the daemon answers; anything else (tui, cache, serve, --help...) always runs in-process
+FORWARDED_COMMANDS = {'hosts', 'racks', 'rack', 'switches', 'summary', 'lookup'}
+LOCAL_COMMANDS = {'tui', 'cache', 'serve'}
+# Options of the forwarded commands that take a value, so their values aren't mistaken for arguments
+VALUE_OPTIONS = {'--file', '--format', '--workers'}
+
+_serving = False  # True inside the daemon, so its own cli() calls never forward
+
+
+def _settings_hash():
+    """
+    Hash of the API and LABOPS settings a command's result depends on (read once at import,
+    before .env loads). Only the hash goes over the socket, never values such as API_KEY.
+    """
+    settings = {name: value for name, value in os.environ.items()
+                if name.startswith(('API_', 'LABOPS_')) and name not in ('LABOPS_SOCKET', 'LABOPS_NO_DAEMON')}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+_SETTINGS = _settings_hash()
+
+
+def _trusted(path):
+    """True if the socket and its directory belong to this user and no one else can write the directory"""
+    if not hasattr(os, 'getuid'):
+        return False
+    try:
+        socket_stat = os.lstat(path)
+        dir_stat = os.stat(os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        return False
+    uid = os.getuid()
+    return (stat.S_ISSOCK(socket_stat.st_mode) and socket_stat.st_uid == uid
+            and dir_stat.st_uid == uid and not dir_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _has_option(args, name):
+    """True if option name is in args, on its own or as name=value"""
+    return any(arg == name or arg.startswith(name + '=') for arg in args)
+
+
+def _arguments(args):
+    """Positional arguments of a subcommand's args"""
+    positional, skip = [], False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg.startswith('-'):
+            skip = arg in VALUE_OPTIONS
+        else:
+            positional.append(arg)
+    return positional
+
+
+def _forwardable(args):
+    """True if a command line can run in the daemon with the same result as in-process"""
+    if not args or args[0].startswith('-') or '--help' in args:
+        return False  # Root options (--fresh, --version) change process-wide state
+    command = args[0]
+    if command in LOCAL_COMMANDS:
+        return False
+    if command == 'hosts' and _has_option(args, '--platform'):
+        return False  # May prompt for a platform choice on stdin
+    if command == 'lookup' and (_has_option(args, '--file') or not _arguments(args[1:])):
+        return False  # Reads IDs from a local file or stdin
+    return command in FORWARDED_COMMANDS or not command.startswith('-')  # Else a host ID
+
+
+def forward(args):
+    """
+    Run a command line on a running `labops serve` daemon, copying its output here.
+    Returns the exit code, or None when the command should run in-process instead.
+    """
+    if _serving or DAEMON_DISABLED or not _forwardable(args) or not _trusted(SOCKET_PATH):
+        return None  # No daemon, or a socket another local user could have planted
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(SOCKET_PATH)
+        sock.settimeout(None)
+    except OSError:
+        return None  # Stale socket file or daemon busy starting - run it here
+
+    with sock, sock.makefile('r', encoding='utf-8') as replies:
+        request = {'argv': list(args), 'tty': [sys.stdout.isatty(), sys.stderr.isatty()], 'settings': _SETTINGS}
+        try:
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        except OSError:
+            return None
+        answered = False
+        for line in replies:
+            message = json.loads(line)
+            if 'exit' in message:
+                return message['exit']
+            if 'refused' in message:
+                return None
+            answered = True
+            stream = sys.stdout if 'o' in message else sys.stderr
+            stream.write(message.get('o', message.get('e')))
+            stream.flush()
+
+    # The daemon went away mid-command; rerun here only if nothing was printed yet
+    if answered:
+        sys.stderr.write('{"error": "labops daemon closed the connection"}\n')
+        return 1
+    return None
+
+
+class _Channel(io.TextIOBase):
+    """Text stream that sends each write to the client as one reply line"""
+
+    encoding = 'utf-8'
+    errors = 'strict'
+
+    def __init__(self, send, kind, tty):
+        super().__init__()
+        self._send = send
+        self._kind = kind
+        self._tty = tty
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if not isinstance(text, str):
+            raise TypeError("write() argument must be str")  # click probes streams with b""
+        if text:
+            self._send({self._kind: text})
+        return len(text)
+
+    def isatty(self):
+        # click strips ANSI codes for non-terminals, so answer for the client's terminal
+        return self._tty
+
+
+def _run(argv, send, tty):
+    """Run one command line with stdout/stderr going to the client; returns its exit code"""
+    from contextlib import redirect_stdout, redirect_stderr
+    import click
+    from rack_cli import cli
+
+    stdout = _Channel(send, 'o', bool(tty[0]))
+    stderr = _Channel(send, 'e', bool(tty[1]))
+    # No stdin: a prompt gets EOF (click aborts) instead of reading the daemon's terminal
+    stdin, sys.stdin = sys.stdin, io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            result = cli.main(args=argv, prog_name='labops', standalone_mode=False)
+            return result if isinstance(result, int) else 0
+        except click.ClickException as e:
+            e.show()
+            return e.exit_code
+        except click.Abort:
+            stderr.write("Aborted!\n")
+            return 1
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            stderr.write(json.dumps({'error': str(e)}) + '\n')
+            return 1
+        finally:
+            sys.stdin = stdin
+
+
+def _prebuild():
+    """Load datasets and build the indexes and rack aggregation commands reuse"""
+    from api_client import get_host_index, get_racks, get_switches, shard_params
+    get_host_index(shard_params('all'))
+    get_racks()
+    get_switches()
+
+
+def _log(message):
+    """Write to the daemon's own stderr - sys.stderr may be redirected to a client mid-command"""
+    import time
+    log = sys.__stderr__
+    if log is None:
+        return
+    try:
+        log.write(f"{time.strftime('[%H:%M:%S]')} {message}\n")
+        log.flush()
+    except (OSError, ValueError):
+        pass  # Terminal gone; keep serving
+
+
+def serve(path=SOCKET_PATH):
+    """Answer CLI requests on a Unix socket until interrupted, keeping the inventory warm in memory"""
+    import signal
+    import socketserver
+    import threading
+    import time
+    import api_client
+    from commands.cache import due_datasets, seconds_until_due
+    # Import every forwarded command now: their colorama init() must not wrap a client channel
+    import commands.list_hosts, commands.list_racks, commands.list_switches  # noqa: F401
+    import commands.lookup, commands.lookup_rack, commands.summary  # noqa: F401
+
+    global _serving
+    _serving = True
+    api_client.SHOW_PROGRESS = False  # Output goes to clients; no progress timers
+    run_lock = threading.Lock()  # Commands share sys.stdout, so they run one at a time
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                request = json.loads(self.rfile.readline())
+            except ValueError:
+                return
+
+            def send(message):
+                self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+
+            if request.get('settings') != _SETTINGS:
+                # Settings are read at import; a client with other ones must run the command itself
+                try:
+                    send({'refused': 'environment differs from the daemon'})
+                except OSError:
+                    pass
+                return
+
+            start = time.perf_counter()
+            try:
+                with run_lock:
+                    code = _run(request.get('argv') or [], send, request.get('tty') or [False, False])
+                send({'exit': code})
+            except OSError:
+                return  # Client went away
+            _log(f"{' '.join(request.get('argv') or [])} -> {code} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def keep_warm():
+        while True:
+            jobs, due = due_datasets(time.time())
+            for key, refresh in due:
+                try:
+                    _log(f"refreshed {key}: {refresh()} records")
+                except Exception as e:
+                    _log(f"refreshing {key} failed: {e}")
+            try:
+                with run_lock:
+                    _prebuild()
+            except Exception as e:
+                _log(f"loading data failed: {e}")
+            time.sleep(seconds_until_due(jobs))
+
+    # A socket file nobody answers on is left over from a daemon that died
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            raise OSError(f"a labops daemon is already listening on {path}")
+        except ConnectionRefusedError:
+            os.unlink(path)
+        finally:
+            probe.close()
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    _log("loading hosts, switches and rack index...")
+    start = time.time()
+    _prebuild()
+    _log(f"ready in {time.time() - start:.1f}s, listening on {path}")
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    threading.Thread(target=keep_warm, daemon=True).start()
+    server = Server(path, Handler)
+    os.chmod(path, 0o600)  # Same user only, like the cache files
+    if not _trusted(path):
+        _log(f"warning: clients won't connect - {os.path.dirname(os.path.abspath(path))} must be "
+             f"owned by you and not writable by group or others")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # Remove the socket on kill too
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        _log("stopped")
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,287 @@
+# Local mock of the hardware tracking API, backed by the CSVs in data/
+#
+#   uvicorn mock_api:app --port 8000
+#
+# Set MOCK_HOST_COUNT to replicate the sample hosts into a larger inventory for benchmarking.
+#
+# /hosts and /switches support incremental refresh: responses carry ETag, Last-Modified and
+# X-Sync-Cursor headers, If-None-Match returns 304 when nothing changed, and /hosts?since=<cursor>
+# returns only hosts changed after the cursor plus the ids of hosts that were deleted or no
+# longer match the filters (marked with X-Sync-Delta). The /mock/* endpoints change data so
+# refreshes can be exercised. /sites lists the site prefixes for sharded per-site /hosts fetches.
+#
+# Full /hosts and /switches listings are paginated when the client passes limit: offset/limit
+# pages carry X-Total-Count, or set MOCK_PAGINATION=cursor to hand out X-Next-Cursor tokens only.
+# MOCK_MAX_PAGE_SIZE caps the page size like a production API would, and MOCK_LATENCY_MS delays
+# every listing response (or page) so concurrent page fetches can be benchmarked as if remote.
+import os
+import csv
+import time
+from typing import Optional
+from email.utils import formatdate
+
+from fastapi import FastAPI, Header, HTTPException, Response
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+API_KEY = os.getenv("API_KEY", "mock-secret-token")
+MOCK_HOST_COUNT = int(os.getenv("MOCK_HOST_COUNT", "0"))
+MOCK_PAGINATION = os.getenv("MOCK_PAGINATION", "offset")  # "offset" or "cursor"
+MOCK_MAX_PAGE_SIZE = int(os.getenv("MOCK_MAX_PAGE_SIZE", "0"))  # 0 = no cap
+MOCK_LATENCY = int(os.getenv("MOCK_LATENCY_MS", "0")) / 1000  # Seconds added to each listing response
+
+# Mock datacenter name -> site prefix used in host locations
+SITES = {'DC-East': 'SEA85', 'DC-West': 'SJC22', 'DC-North': 'IAD71'}
+
+app = FastAPI(title="LabOps Mock API")
+
+
+def _read_csv(name):
+    with open(os.path.join(DATA_DIR, name), newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def _rack_position(site, rack_row):
+    """Build a SEA85.161.R11-L13 style rack position from the mock rack info"""
+    parts = dict(p.split('-', 1) for p in rack_row['Rack Info'].split() if '-' in p)
+    row, slot = int(parts.get('Row', 0)), int(parts.get('Slot', 0))
+    return f"{site}.{150 + row}.R{row}-L{slot:02d}"
+
+
+def _build_host(index, row, rack_row):
+    """Convert a mock CSV row into the /hosts record shape"""
+    site = SITES.get(row['Location'], row['Location'])
+    position = _rack_position(site, rack_row) if rack_row else None
+    vlan = (rack_row or {}).get('Console VLAN', '').replace('VLAN-', '')
+    return {
+        'id': index,
+        'assetid': row['AssetId'],
+        'hardwareid': row['HardwareId'],
+        'hostname': row['Hostname'],
+        'hostclass': row['Hostclass'],
+        'platform': row['Platform'],
+        'manufacturer': row['Manufacturer'],
+        'usagetype': {'usagetype': row['Usage Type']},
+        'status': {'status': row['Status']},
+        'lan_ip': row['LAN IP'],
+        'con_ip': row['BMC IP'],
+        'checkout_owner': row['Checkout Owner'] or None,
+        'location': f"{position} {rack_row['Position']}" if position else site,
+        'serverrack': {
+            'position': position,
+            'lab': rack_row['Lab'],
+            'consolevlan': {'vlanid': int(vlan) if vlan.isdigit() else None,
+                            'subnet': rack_row['Console Subnet']},
+        } if rack_row else {},
+        'hwmon_timestamp': f"{row['First Seen']}T00:00:00Z",
+    }
+
+
+def _load_inventory():
+    """Load hosts, K2 interfaces and switches from the CSV fixtures"""
+    host_rows = _read_csv('mock_hosts.csv')
+    racks_by_asset = {r['Asset ID']: r for r in _read_csv('mock_racks.csv')}
+
+    count = max(MOCK_HOST_COUNT, len(host_rows))
+    hosts, k2_ips = [], {}
+    for i in range(count):
+        row = dict(host_rows[i % len(host_rows)])
+        rack_row = racks_by_asset.get(row['AssetId'])
+        if i >= len(host_rows):
+            # Replicated host - give it unique identifiers
+            row['AssetId'] = f"H{1000 + i}"
+            row['HardwareId'] = f"{row['HardwareId']}-{i}"
+            row['Hostname'] = f"host-{i:06d}.mocklab.example.com"
+        hosts.append(_build_host(i, row, rack_row))
+        k2_ips[row['HardwareId']] = row['K2 IP']
+
+    switches = [{
+        'assetid': s['Asset ID'],
+        'name': s['Name'],
+        'serial': s['Serial Number'],
+        'model': s['Switchmodel'],
+        'rack': s['Associated Racks'],
+        'subnet': s['Subnet'],
+        'speed': s['Speed'],
+        'ports': int(s['Port Count']),
+        'location': SITES.get(s['Location'], s['Location']),
+        'status': 'Active',
+    } for s in _read_csv('mock_switches.csv')]
+
+    return hosts, k2_ips, switches
+
+
+HOSTS, K2_IPS, SWITCHES = _load_inventory()
+
+# Change tracking for incremental refresh: every change bumps the inventory version
+SYNC = {'version': 1, 'modified': time.time()}
+HOST_VERSIONS = {h['id']: 1 for h in HOSTS}
+DELETED_VERSIONS = {}  # host id -> version it was deleted in
+
+
+def _bump_version():
+    SYNC['version'] += 1
+    SYNC['modified'] = time.time()
+    return SYNC['version']
+
+
+def _sync_headers(response, etag):
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = formatdate(SYNC['modified'], usegmt=True)
+    response.headers['X-Sync-Cursor'] = str(SYNC['version'])
+
+
+def _check_key(x_api_key):
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+
+def _page(response, records, offset, limit, cursor):
+    """One page of a listing as {"response", "count", "total"}; the cursor is the next offset"""
+    start = int(cursor) if cursor else offset or 0
+    if limit is None or limit <= 0:
+        limit = len(records)
+    if MOCK_MAX_PAGE_SIZE:
+        limit = min(limit, MOCK_MAX_PAGE_SIZE)
+    page = records[start:start + limit]
+    end = start + len(page)
+    if end < len(records):
+        response.headers['X-Next-Cursor'] = str(end)
+    if MOCK_PAGINATION == 'cursor':
+        return {"response": page, "count": len(page)}
+    response.headers['X-Total-Count'] = str(len(records))
+    return {"response": page, "count": len(page), "total": len(records)}
+
+
+@app.get("/hosts")
+def list_hosts(response: Response, status: Optional[str] = None, location: Optional[str] = None,
+               platform: Optional[str] = None, since: Optional[int] = None,
+               offset: Optional[int] = None, limit: Optional[int] = None, cursor: Optional[str] = None,
+               x_api_key: str = Header(None), if_none_match: Optional[str] = Header(None)):
+    _check_key(x_api_key)
+    etag = f'"hosts-v{SYNC["version"]}"'
+    if if_none_match == etag:
+        not_modified = Response(status_code=304)
+        _sync_headers(not_modified, etag)
+        return not_modified
+    _sync_headers(response, etag)
+
+    hosts = HOSTS
+    # Server-side filters: exact status/platform and location prefix, all case-insensitive
+    if status:
+        hosts = [h for h in hosts if h['status']['status'].lower() == status.lower()]
+    if location:
+        hosts = [h for h in hosts if h['location'].upper().startswith(location.upper())]
+    if platform:
+        hosts = [h for h in hosts if (h['platform'] or '').lower() == platform.lower()]
+
+    if since is not None and 0 < since <= SYNC['version']:
+        # Delta: changed hosts that match, plus ids the client should drop
+        matching_ids = {h['id'] for h in hosts}
+        changed = [h for h in hosts if HOST_VERSIONS[h['id']] > since]
+        deleted = [host_id for host_id, version in DELETED_VERSIONS.items() if version > since]
+        deleted += [h['id'] for h in HOSTS if HOST_VERSIONS[h['id']] > since and h['id'] not in matching_ids]
+        response.headers['X-Sync-Delta'] = '1'
+        return {"response": changed, "deleted": deleted, "count": len(changed)}
+
+    time.sleep(MOCK_LATENCY)
+    if limit is not None or cursor:
+        return _page(response, hosts, offset, limit, cursor)
+    return {"response": hosts, "count": len(hosts)}
+
+
+@app.get("/sites")
+def list_sites(x_api_key: str = Header(None)):
+    """Site prefixes hosts are located under, for per-site sharded /hosts?location= fetches"""
+    _check_key(x_api_key)
+    counts = {}
+    for host in HOSTS:
+        site = host['location'].split('.')[0].split()[0]
+        counts[site] = counts.get(site, 0) + 1
+    sites = [{'site': site, 'hosts': count} for site, count in sorted(counts.items())]
+    return {"response": sites, "count": len(sites)}
+
+
+@app.get("/hosts/find")
+def find_host(assetid: str, x_api_key: str = Header(None)):
+    _check_key(x_api_key)
+    for host in HOSTS:
+        if host['assetid'] == assetid:
+            return {"response": host}
+    raise HTTPException(status_code=404, detail=f"Asset ID {assetid} not found")
+
+
+@app.get("/hosts/hoststatus")
+def host_status(hardwareid: str, x_api_key: str = Header(None)):
+    _check_key(x_api_key)
+    for host in HOSTS:
+        if host['hardwareid'].lower() == hardwareid.lower():
+            return {"response": {'assetid': host['assetid'], 'hardwareid': host['hardwareid'],
+                                 'status': host['status']}}
+    raise HTTPException(status_code=404, detail=f"Hardware ID {hardwareid} not found")
+
+
+@app.get("/serverracks/details")
+def rack_details(id: str, x_api_key: str = Header(None)):
+    _check_key(x_api_key)
+    hosts = [h for h in HOSTS if (h.get('serverrack') or {}).get('position') == id]
+    if not hosts:
+        raise HTTPException(status_code=404, detail=f"Rack {id} not found")
+    return {"response": {**hosts[0]['serverrack'], 'hosts': hosts,
+                         'switches': [s for s in SWITCHES if s['rack'] == id]}}
+
+
+@app.get("/switches")
+def list_switches(response: Response, offset: Optional[int] = None, limit: Optional[int] = None,
+                  cursor: Optional[str] = None, x_api_key: str = Header(None),
+                  if_none_match: Optional[str] = Header(None)):
+    _check_key(x_api_key)
+    etag = '"switches-v1"'  # Switch inventory never changes in the mock
+    if if_none_match == etag:
+        return Response(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    time.sleep(MOCK_LATENCY)
+    if limit is not None or cursor:
+        return _page(response, SWITCHES, offset, limit, cursor)
+    return SWITCHES
+
+
+@app.get("/interfaces/{hardware_id}")
+def interfaces(hardware_id: str, x_api_key: str = Header(None)):
+    _check_key(x_api_key)
+    k2_ip = K2_IPS.get(hardware_id)
+    if k2_ip is None:
+        raise HTTPException(status_code=404, detail=f"Hardware ID {hardware_id} not found")
+    return {"direct_access": [{'type': 'K2', 'ip': k2_ip}] if k2_ip else []}
+
+
+def _host_by_assetid(assetid):
+    for host in HOSTS:
+        if host['assetid'] == assetid:
+            return host
+    raise HTTPException(status_code=404, detail=f"Asset ID {assetid} not found")
+
+
+@app.post("/mock/hosts/{assetid}/status")
+def set_host_status(assetid: str, status: str, x_api_key: str = Header(None)):
+    """Change a host's status so incremental refresh has something to pick up"""
+    _check_key(x_api_key)
+    host = _host_by_assetid(assetid)
+    host['status'] = {'status': status}
+    host['hwmon_timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    HOST_VERSIONS[host['id']] = _bump_version()
+    return {"response": host}
+
+
+@app.delete("/mock/hosts/{assetid}")
+def delete_host(assetid: str, x_api_key: str = Header(None)):
+    _check_key(x_api_key)
+    host = _host_by_assetid(assetid)
+    HOSTS.remove(host)
+    HOST_VERSIONS.pop(host['id'])
+    DELETED_VERSIONS[host['id']] = _bump_version()
+    return {"response": {'deleted': host['id']}}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -1,14 +1,23 @@
 # Handles CLI interface (Click decorators, options)
+#
+# Command modules (and through them api_client, requests, colorama...) are imported inside each
+# callback, so --help and commands served from the cache only load what they use.
+# benchmarks/bench_import_time.py keeps startup within budget.
+import sys
 import click
-from commands.lookup import lookup_host
-from commands.lookup_rack import lookup_rack
-from commands.list_hosts import list_hosts
-from commands.list_racks import list_racks
-from commands.list_switches import list_switches
-from commands.summary import summary
+from commands.formats import OUTPUT_FORMATS  # Light: only csv/json
+from inventory_summary import GROUP_BY_FIELDS  # Light: only host_index
 
 
 class CustomGroup(click.Group):
+    def main(self, args=None, *main_args, **kwargs):
+        # Hand the command to a running `labops serve` daemon when there is one
+        from labops_daemon import forward
+        exit_code = forward(sys.argv[1:] if args is None else list(args))
+        if exit_code is not None:
+            sys.exit(exit_code)
+        return super().main(args, *main_args, **kwargs)
+
     def get_command(self, ctx, cmd_name):
         # First try to get a regular command from registered commands
         rv = click.Group.get_command(self, ctx, cmd_name)
@@ -17,7 +26,8 @@ class CustomGroup(click.Group):
 
         # If no command found, treat as host ID lookup
         def host_lookup_command(host_id=cmd_name):
-            if '.' in host_id or any(c.isalpha() for c in host_id):
+            from commands.lookup import lookup_host, is_hardware_id
+            if is_hardware_id(host_id):
                 lookup_host(None, host_id)
             else:
                 lookup_host(host_id, None)
@@ -28,8 +38,9 @@ class CustomGroup(click.Group):
 
 @click.group(cls=CustomGroup, invoke_without_command=True)
 @click.version_option("1.0.0")
+@click.option('--fresh', is_flag=True, help='Wait for current data instead of serving an expired cache while it refreshes')
 @click.pass_context
-def cli(ctx):
+def cli(ctx, fresh):
     """LabOps - Datacenter Lab Resource Management CLI
     
     A powerful command-line tool for managing and discovering datacenter lab resources.
@@ -44,7 +55,14 @@ def cli(ctx):
       labops hosts --location all          # Search all datacenters globally
       labops rack R1-A01                   # Show detailed rack contents
       labops racks --limit 20              # List first 20 racks
+      labops hosts --location all --format ndjson | jq .assetid
+      labops lookup --file ids.txt         # Look up many hosts at once
+      labops cache warm                    # Pre-fetch hosts and switches
+      labops serve &                       # Answer commands from memory
     """
+    if fresh:
+        from api_client import require_fresh
+        require_fresh()
     if ctx.invoked_subcommand is None:
         click.echo(ctx.get_help())
 
@@ -52,10 +70,10 @@ def cli(ctx):
 @cli.command(name="hosts")
 @click.option('--status', help='Filter hosts by status (Available, Reserved, etc.)')
 @click.option('--platform', help='Fuzzy search hosts by platform (case-insensitive)')
-@click.option('--hostname', help='Fuzzy search hosts by hostname (case-insensitive)')
-@click.option('--usagetype', help='Fuzzy search hosts by usage type (case-insensitive)')
+@click.option('--hostname', help='Filter by hostname, exact or prefix match (case-insensitive)')
+@click.option('--usagetype', help='Filter by usage type, exact or prefix match (case-insensitive)')
 @click.option('--location', help='Filter by location prefix (e.g., sea85, sjc) or use "all" for all locations')
-@click.option('--checkout-owner', help='Fuzzy search hosts by checkout owner (case-insensitive)')
+@click.option('--checkout-owner', help='Filter by checkout owner, exact or prefix match (case-insensitive)')
 @click.option('--bmc', type=click.Choice(['available', 'unavailable'], case_sensitive=False), help='Filter hosts by BMC availability (available/unavailable)')
 @click.option('--available', is_flag=True, help='Show only available hosts')
 @click.option('--pending', is_flag=True, help='Show only hosts pending admin')
@@ -70,12 +88,16 @@ def cli(ctx):
 @click.option('--returned-vendor', is_flag=True, help='Show only hosts returned to vendor')
 @click.option('--limit', type=int, help='Limit number of results (e.g., --limit 50)')
 @click.option('--all', 'search_all', help='Fuzzy search across all fields (case-insensitive)')
-def list_hosts_cmd(status, platform, hostname, usagetype, location, checkout_owner, bmc, available, pending, scrapped, reserved, checked_out, in_qual, pre_qual, core_services, liquidated, pending_disposal, returned_vendor, limit, search_all):
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS, case_sensitive=False),
+              default='text', show_default=True, help='Output format; ndjson, csv and json stream rows without colors')
+def list_hosts_cmd(status, platform, hostname, usagetype, location, checkout_owner, bmc, available, pending, scrapped, reserved, checked_out, in_qual, pre_qual, core_services, liquidated, pending_disposal, returned_vendor, limit, search_all, output_format):
     """List and filter datacenter hosts with advanced search capabilities
     
     Defaults to SEA85 location for performance. Use --location all for global search.
     Supports fuzzy matching on platforms and multiple filtering options.
     """
+    from commands.list_hosts import list_hosts
+
     # Convert flag shortcuts to status filter
     if available:
         status = 'Available'
@@ -104,19 +126,23 @@ def list_hosts_cmd(status, platform, hostname, usagetype, location, checkout_own
     bmc_flag = bmc == 'available' if bmc else False
     no_bmc_flag = bmc == 'unavailable' if bmc else False
     
-    list_hosts(status, platform, hostname, usagetype, location, checkout_owner, bmc_flag, no_bmc_flag, limit, search_all)
+    list_hosts(status, platform, hostname, usagetype, location, checkout_owner, bmc_flag, no_bmc_flag, limit, search_all,
+               output_format=output_format.lower())
 
 
 @cli.command(name="racks")
 @click.option('--position', help='Filter by specific rack position')
 @click.option('--limit', type=int, help='Limit number of results')
-def list_racks_cmd(position, limit):
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS, case_sensitive=False),
+              default='text', show_default=True, help='Output format; ndjson, csv and json stream rows without colors')
+def list_racks_cmd(position, limit, output_format):
     """List datacenter racks with host counts and status summaries
     
     Shows rack positions, host counts, and status breakdowns.
     Filter by specific rack position or limit results.
     """
-    list_racks(position=position, limit=limit)
+    from commands.list_racks import list_racks
+    list_racks(position=position, limit=limit, output_format=output_format.lower())
 
 
 @cli.command(name="switches")
@@ -125,28 +151,129 @@ def list_switches_cmd():
     
     Display switch inventory and network infrastructure information.
     """
+    from commands.list_switches import list_switches
     list_switches()
 
 
 @cli.command(name="rack")
 @click.argument('position')
-def rack_cmd(position):
+@click.option('--no-cache', is_flag=True, help='Bypass the K2 IP cache and query every host interface')
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS, case_sensitive=False),
+              default='text', show_default=True, help='Output format; ndjson, csv and json stream rows without colors')
+def rack_cmd(position, no_cache, output_format):
     """Show detailed rack contents including all hosts and their specifications
     
     Displays a comprehensive table with asset IDs, hardware IDs, platforms,
     BMC IPs, and LAN IPs for all hosts in the specified rack.
     """
-    lookup_rack(position)
+    from commands.lookup_rack import lookup_rack
+    lookup_rack(position, use_cache=not no_cache, output_format=output_format.lower())
+
+
+@cli.command(name="lookup")
+@click.argument('ids', nargs=-1)
+@click.option('--file', 'id_file', type=click.File('rb'), help='Read IDs from a file, one per line ("-" for stdin)')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'ndjson'], case_sensitive=False),
+              default='table', show_default=True, help='Output format')
+@click.option('--workers', type=int, default=8, show_default=True, help='Concurrent lookups')
+def lookup_cmd(ids, id_file, output_format, workers):
+    """Look up many hosts by asset ID or hardware ID at once
+
+    IDs come from the arguments, --file, or stdin when neither is given.
+    Results stream out as each lookup completes, from the local cache when fresh.
+
+    \b
+    Examples:
+      labops lookup 1703827523 SNX.HMBLT21N062500123
+      labops lookup --file checkedouthosts.txt --format ndjson
+      cat ids.txt | labops lookup
+    """
+    from commands.lookup import bulk_lookup, decode_ids, read_ids
+
+    lines = list(ids)
+    try:
+        if id_file is not None:
+            lines.extend(decode_ids(id_file.read()).splitlines())
+        elif not ids:
+            lines.extend(decode_ids(click.open_file('-', 'rb').read()).splitlines())
+    except UnicodeDecodeError as e:
+        click.echo(f'{{"error": "Could not read IDs as {e.encoding}: {e.reason} at byte {e.start}"}}')
+        return
+
+    host_ids = read_ids(lines)
+    if not host_ids:
+        click.echo('{"error": "No IDs given"}')
+        return
+    bulk_lookup(host_ids, output_format=output_format.lower(), workers=workers)
 
 
 @cli.command(name="summary")
-def summary_cmd():
+@click.option('--location', help='Location prefix to summarize (default SEA85), or "all" for every location')
+@click.option('--group-by', 'group_by', multiple=True, type=click.Choice(GROUP_BY_FIELDS, case_sensitive=False),
+              help='Also break totals, BMC coverage and statuses down by this field (repeatable)')
+def summary_cmd(location, group_by):
     """Display datacenter resource summary and health overview
     
     Provides high-level statistics on host counts, rack utilization,
     and overall datacenter capacity and status.
+
+    \b
+    Examples:
+      labops summary --group-by room
+      labops summary --location all --group-by site --group-by platform
     """
-    summary()
+    from commands.summary import summary
+    summary(location, tuple(dict.fromkeys(field.lower() for field in group_by)))
+
+
+@cli.group(name="cache")
+def cache_group():
+    """Inspect and pre-warm the local data cache
+
+    \b
+    Examples:
+      labops cache status                  # Age and size of every cached dataset
+      labops cache warm --k2               # Refresh hosts, switches and K2 IPs now
+      labops cache warm --daemon &         # Refresh each dataset before it expires
+    """
+
+
+@cache_group.command(name="warm")
+@click.option('--k2', is_flag=True, help='Also resolve K2 IPs for every host in the default location')
+@click.option('--daemon', is_flag=True, help='Keep running and refresh datasets shortly before they expire')
+@click.option('--only', multiple=True, metavar='KEY',
+              help='Refresh only this dataset (as listed by cache status); repeatable')
+def cache_warm_cmd(k2, daemon, only):
+    """Fetch hosts and switches in parallel so the next command hits a warm cache"""
+    from commands.cache import warm_cache, run_daemon
+    if daemon:
+        run_daemon(k2=k2)
+    else:
+        warm_cache(k2=k2, only=only)
+
+
+@cache_group.command(name="status")
+def cache_status_cmd():
+    """Show age, freshness and size for each cached dataset"""
+    from commands.cache import cache_status
+    cache_status()
+
+
+@cli.command(name="serve")
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False), help='Unix socket to listen on (default: LABOPS_SOCKET or <cache dir>/labops.sock)')
+def serve_cmd(socket_path):
+    """Keep the inventory in memory and answer other labops commands from it
+
+    Runs until interrupted. While it is up, hosts, racks, rack, switches, summary
+    and host lookups are sent to it over a Unix socket instead of loading the
+    cache in every process. Set LABOPS_NO_DAEMON=1 to bypass it.
+    """
+    from labops_daemon import serve, SOCKET_PATH
+    try:
+        serve(socket_path or SOCKET_PATH)
+    except OSError as e:
+        click.echo(f'{{"error": "{e}"}}')
+        sys.exit(1)
 
 
 @cli.command(name="tui")
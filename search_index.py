@@ -0,0 +1,69 @@
+# Search-as-you-type index over a hosts snapshot: sorted prefix terms plus trigram posting lists
+from bisect import bisect_left
+
+SEARCH_FIELDS = ('assetid', 'hardwareid', 'hostname', 'platform', 'con_ip', 'lan_ip')
+
+
+class SearchIndex:
+    """Prefix and substring search over one hosts snapshot.
+
+    ``terms`` is a sorted list of (lowercased field value, row) for prefix lookups, and
+    ``trigrams`` maps every 3-character substring to the ascending rows containing it.
+    """
+
+    def __init__(self, hosts, fields=SEARCH_FIELDS):
+        self.hosts = hosts
+        self.texts = []  # Row -> lowercased field values joined by NUL, for substring checks
+        terms = []
+        trigrams = {}
+
+        for row, host in enumerate(hosts):
+            if not isinstance(host, dict):
+                self.texts.append('')
+                continue
+            values = [str(host.get(field) or '').lower() for field in fields]
+            values = [value for value in values if value]
+            terms.extend((value, row) for value in values)
+
+            text = '\0'.join(values)
+            self.texts.append(text)
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                trigrams.setdefault(gram, []).append(row)
+
+        terms.sort()
+        self.terms = terms
+        self.trigrams = trigrams
+
+    def _prefix_rows(self, query):
+        """Rows with a field starting with query, shortest (exact) terms first"""
+        i = bisect_left(self.terms, (query,))
+        while i < len(self.terms) and self.terms[i][0].startswith(query):
+            yield self.terms[i][1]
+            i += 1
+
+    def _substring_rows(self, query):
+        """Rows with a field containing query, in original order"""
+        if len(query) < 3:
+            candidates = range(len(self.texts))
+        else:
+            # Walk the rarest trigram's posting list and confirm the full substring per row
+            postings = [self.trigrams.get(query[i:i + 3]) for i in range(len(query) - 2)]
+            candidates = min(postings, key=len) if all(postings) else []
+        texts = self.texts
+        return (row for row in candidates if query in texts[row])
+
+    def search(self, query, limit=50):
+        """Hosts matching query: exact and prefix matches first, then substring matches"""
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        rows, seen = [], set()
+        for source in (self._prefix_rows(query), self._substring_rows(query)):
+            for row in source:
+                if row not in seen:
+                    seen.add(row)
+                    rows.append(row)
+                    if len(rows) >= limit:
+                        return [self.hosts[row] for row in rows]
+        return [self.hosts[row] for row in rows]
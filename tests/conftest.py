@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache_store
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Point cache_store at an empty directory, with nothing remembered in memory"""
+    monkeypatch.setattr(cache_store, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(cache_store, '_memory', {})
+    monkeypatch.setattr(cache_store, 'CACHE_FORMAT', 'json')
+    return tmp_path
@@ -0,0 +1,98 @@
+import pytest
+
+import api_client
+import cache_store
+
+
+class FakeResponse:
+    def __init__(self, body=None, headers=None, status_code=200):
+        self.body = body
+        self.headers = headers or {}
+        self.status_code = status_code
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def api(cache_dir, monkeypatch):
+    """Record /hosts requests and answer them from the returned list of responses"""
+    monkeypatch.setattr(api_client, 'INCREMENTAL_REFRESH', True)
+    monkeypatch.setattr(api_client, 'PAGE_SIZE', 0)
+    requests, responses = [], []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        requests.append({'url': url, 'headers': headers or {}, 'params': params or {}})
+        return responses.pop(0)
+
+    monkeypatch.setattr(api_client, '_api_get', fake_get)
+    return requests, responses
+
+
+def test_merge_replaces_in_place_and_appends_new():
+    cached = {'response': [{'id': 1, 'status': 'a'}, {'id': 2, 'status': 'a'}]}
+    merged = api_client._merge_host_delta(cached, {'response': [{'id': 3}, {'id': 1, 'status': 'b'}]})
+    assert merged == {'response': [{'id': 1, 'status': 'b'}, {'id': 2, 'status': 'a'}, {'id': 3}], 'count': 3}
+
+
+def test_merge_drops_deleted_ids():
+    cached = [{'id': 1}, {'id': 2}, {'id': 3}]  # Bare lists are accepted too
+    merged = api_client._merge_host_delta(cached, {'response': [], 'deleted': [2, '3', 99]})
+    assert merged == {'response': [{'id': 1}], 'count': 1}
+
+
+def test_merge_drops_hosts_that_left_the_filter():
+    # A ?status=available delta lists hosts that no longer match under "deleted"
+    cached = {'response': [{'id': 1, 'status': 'available'}, {'id': 2, 'status': 'available'}]}
+    merged = api_client._merge_host_delta(cached, {'response': [], 'deleted': [1]})
+    assert merged['response'] == [{'id': 2, 'status': 'available'}]
+
+
+def test_merge_keys_by_assetid_without_id():
+    cached = {'response': [{'assetid': 'H1', 'status': 'a'}, {'assetid': 'H2'}]}
+    merged = api_client._merge_host_delta(cached, {'response': [{'assetid': 'H1', 'status': 'b'}],
+                                                   'deleted': ['H2']})
+    assert merged['response'] == [{'assetid': 'H1', 'status': 'b'}]
+
+
+def test_conditional_request_uses_sync_state(cache_dir, monkeypatch):
+    monkeypatch.setattr(api_client, 'INCREMENTAL_REFRESH', True)
+    cache_store.save('hosts', {'response': []}, 100.0,
+                     {'etag': '"v3"', 'last_modified': 'Sat, 17 Oct 2026 10:00:00 GMT', 'cursor': '3'})
+    headers, params = api_client._conditional_request('hosts', {'response': []})
+    assert headers == {'If-None-Match': '"v3"', 'If-Modified-Since': 'Sat, 17 Oct 2026 10:00:00 GMT'}
+    assert params == {'since': '3'}
+    assert api_client._conditional_request('hosts', None) == ({}, {})
+
+    monkeypatch.setattr(api_client, 'INCREMENTAL_REFRESH', False)
+    assert api_client._conditional_request('hosts', {'response': []}) == ({}, {})
+
+
+def test_not_modified_keeps_snapshot_and_restarts_ttl(api):
+    requests, responses = api
+    cached = {'response': [{'id': 1}]}
+    cache_store.save('hosts', cached, 100.0, {'etag': '"v1"'})
+    responses.append(FakeResponse(status_code=304, headers={'ETag': '"v1"'}))
+
+    assert api_client._refresh_hosts('hosts', None, cached, 500.0, progress=False) is cached
+    assert requests[0]['headers']['If-None-Match'] == '"v1"'
+    assert cache_store.load_meta('hosts')['time'] == 500.0
+    assert cache_store.load('hosts') == (cached, 500.0)
+
+
+def test_delta_refresh_merges_and_saves_cursor(api):
+    requests, responses = api
+    cached = {'response': [{'id': 1}, {'id': 2}]}
+    cache_store.save('hosts', cached, 100.0, {'cursor': '4'})
+    responses.append(FakeResponse({'response': [{'id': 3}], 'deleted': [1]},
+                                  {'X-Sync-Delta': '1', 'X-Sync-Cursor': '5'}))
+
+    data = api_client._refresh_hosts('hosts', None, cached, 500.0, progress=False)
+    assert requests[0]['params'] == {'since': '4'}
+    assert data == {'response': [{'id': 2}, {'id': 3}], 'count': 2}
+    cache_store._memory.clear()
+    assert cache_store.load('hosts') == (data, 500.0)
+    assert cache_store.load_meta('hosts')['cursor'] == '5'
@@ -0,0 +1,81 @@
+import os
+import threading
+
+import pytest
+
+import cache_store
+
+
+def _leftovers(cache_dir):
+    return [name for name in os.listdir(cache_dir) if name.startswith('.tmp-')]
+
+
+def test_save_and_load(cache_dir):
+    cache_store.save('hosts', {'response': [{'id': 1}]}, 100.0, {'etag': '"v1"'})
+    cache_store._memory.clear()
+    assert cache_store.load('hosts') == ({'response': [{'id': 1}]}, 100.0)
+    assert cache_store.load_meta('hosts')['etag'] == '"v1"'
+    assert cache_store.load('missing') == (None, 0)
+
+
+def test_failed_write_keeps_previous_payload(cache_dir):
+    cache_store.save('hosts', {'response': [1]}, 100.0)
+
+    def broken(f):
+        f.write('{"response": [')
+        raise ValueError("disk full")
+
+    with pytest.raises(ValueError):
+        cache_store._atomic_write(cache_store._path('hosts', '.json'), broken)
+    cache_store._memory.clear()
+    assert cache_store.load('hosts') == ({'response': [1]}, 100.0)
+    assert not _leftovers(cache_dir)
+
+
+def test_switching_format_drops_old_payload(cache_dir, monkeypatch):
+    cache_store.save('hosts', {'response': [1]}, 100.0)
+    monkeypatch.setattr(cache_store, 'CACHE_FORMAT', 'pickle')
+    cache_store.save('hosts', {'response': [2]}, 200.0)
+    assert sorted(os.listdir(cache_dir)) == ['hosts.lock', 'hosts.meta.json', 'hosts.pickle']
+    cache_store._memory.clear()
+    assert cache_store.load('hosts') == ({'response': [2]}, 200.0)
+
+
+def test_update_merges_under_lock(cache_dir):
+    def add(data, n):
+        return {**(data or {}), str(n): n}
+
+    threads = [threading.Thread(target=lambda n=n: cache_store.update('interfaces', lambda d: add(d, n), 100.0 + n))
+               for n in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache_store._memory.clear()
+    data, _ = cache_store.load('interfaces')
+    assert data == {str(n): n for n in range(20)}
+
+
+def test_save_stream_commits_only_when_exhausted(cache_dir):
+    cache_store.save('hosts', {'response': [{'id': 0}]}, 100.0)
+
+    def interrupted():
+        yield {'id': 1}
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        list(cache_store.save_stream('hosts', interrupted(), 200.0))
+    assert cache_store.load('hosts') == ({'response': [{'id': 0}]}, 100.0)
+    assert not _leftovers(cache_dir)
+
+    assert list(cache_store.save_stream('hosts', iter([{'id': 1}, {'id': 2}]), 300.0)) == [{'id': 1}, {'id': 2}]
+    assert cache_store.load('hosts') == ({'response': [{'id': 1}, {'id': 2}]}, 300.0)
+
+
+def test_save_stream_uses_configured_format(cache_dir, monkeypatch):
+    monkeypatch.setattr(cache_store, 'CACHE_FORMAT', 'pickle')
+    list(cache_store.save_stream('hosts', iter([{'id': 1}]), 100.0, {'cursor': '7'}))
+    meta = cache_store.load_meta('hosts')
+    assert (meta['format'], meta['cursor']) == ('pickle', '7')
+    cache_store._memory.clear()
+    assert cache_store.load('hosts') == ({'response': [{'id': 1}]}, 100.0)
@@ -0,0 +1,34 @@
+import itertools
+
+import pytest
+
+from host_index import HostIndex, host_matches
+
+HOSTS = [
+    {'assetid': 'H1', 'status': {'status': 'Available'}, 'platform': 'x86', 'location': 'SEA85.159.R6-L01 12', 'con_ip': '10.0.0.1'},
+    {'assetid': 'H2', 'status': {'status': 'available'}, 'platform': 'ARM', 'location': 'sea85.160.R1-L02 3', 'con_ip': ' '},
+    {'assetid': 'H3', 'status': {'status': 'Scrapped'}, 'platform': 'x86', 'location': 'SJC22.160.R10-L18 35'},
+    {'assetid': 'H4', 'status': None, 'platform': None, 'location': None, 'con_ip': '10.0.0.4'},
+    {'assetid': 'H5', 'status': {'status': 'In Use'}, 'platform': 'x86_64', 'location': 'SEA851.1.R1-L01 1', 'con_ip': '10.0.0.5'},
+    'not a host',
+    {'assetid': 'H6', 'status': {'status': 'Available'}, 'platform': 'arm', 'location': 'SEA85.159.R6-L02 4'},
+]
+
+STATUSES = [None, 'available', 'SCRAPPED', 'missing']
+LOCATIONS = [None, 'all', 'SEA85', 'sea85.159', 'SEA8', 'SJC22.160.R10', 'nowhere']
+PLATFORMS = [None, 'x86', 'arm']
+BMC = [(False, False), (True, False), (False, True), (True, True)]
+
+
+@pytest.mark.parametrize('status,location,platform,bmc', list(itertools.product(STATUSES, LOCATIONS, PLATFORMS, BMC)))
+def test_filter_matches_host_matches(status, location, platform, bmc):
+    options = dict(status=status, location=location, platform=platform, bmc=bmc[0], no_bmc=bmc[1])
+    expected = [host for host in HOSTS if host_matches(host, **options)]
+    assert HostIndex(HOSTS).filter(**options) == expected
+
+
+def test_find_by_asset_or_hardware_id():
+    index = HostIndex([{'assetid': 'H1', 'hardwareid': 'HW-1'}, {'assetid': 'H2'}])
+    assert index.find(' h2 ')['assetid'] == 'H2'
+    assert index.find('hw-1')['assetid'] == 'H1'
+    assert index.find('H3') is None
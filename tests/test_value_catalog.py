@@ -0,0 +1,25 @@
+from value_catalog import ValueCatalog
+
+CATALOG = ValueCatalog(['x86', 'x86_64', 'X86_64', 'ARM', 'arm64', 'Power9', None, ''])
+
+
+def test_resolve_prefers_exact_key():
+    assert CATALOG.resolve('x86') == ['x86']
+    assert CATALOG.resolve(' ARM ') == ['arm']
+
+
+def test_resolve_falls_back_to_prefix():
+    assert CATALOG.resolve('X') == ['x86', 'x86_64']
+    assert CATALOG.resolve('pow') == ['power9']
+
+
+def test_resolve_never_guesses():
+    # Close misspellings are only suggested, never filtered on
+    assert CATALOG.resolve('arn') == []
+    assert CATALOG.resolve('86') == []
+    assert CATALOG.similar('arn')[0] in ('arm', 'arm64')
+
+
+def test_names_keep_most_common_spelling():
+    assert CATALOG.names['x86_64'] in ('x86_64', 'X86_64')
+    assert CATALOG.counts['x86_64'] == 2
@@ -1,8 +1,21 @@
+import os
+from textual import work
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical
-from textual.widgets import Header, Footer, Tree, Static, Input, TextArea
+from textual.widgets import Header, Footer, Tree, Static, Input, TextArea, LoadingIndicator
 from textual.binding import Binding
-from api_client import get_hosts, get_racks, get_k2_ip
+from textual.worker import get_current_worker
+import api_client
+from api_client import find_host, get_racks, get_k2_ip, get_search_index
+from host_index import room_name
+
+HOST_PAGE_SIZE = int(os.getenv("LABOPS_TUI_PAGE_SIZE", "50"))  # Host leaves added per rack page
+SEARCH_RESULT_LIMIT = 50  # Live results shown while typing a search
+
+
+def host_label(host):
+    return f"{host.get('assetid', 'N/A')}: {host.get('platform', 'Unknown')} [{host.get('status', 'Unknown')}]"
+
 
 class LabOpsTUI(App):
     """LabOps Terminal User Interface"""
@@ -24,6 +37,10 @@ class LabOpsTUI(App):
         height: 100%;
     }
     
+    #tree_loading {
+        height: 3;
+    }
+    
     #rack_details {
         height: 100%;
         overflow-y: auto;
@@ -57,6 +74,7 @@ class LabOpsTUI(App):
         yield Header()
         yield Horizontal(
             Container(
+                LoadingIndicator(id="tree_loading", classes="hidden"),
                 Tree("SEALAB85 Racks", id="rack_tree"),
                 id="left_panel"
             ),
@@ -70,6 +88,17 @@ class LabOpsTUI(App):
 
     def on_mount(self) -> None:
         """Load initial data"""
+        self.rooms = {}  # Room name -> racks, grouped once at load
+        self.room_statuses = {}  # Room name -> {status -> hosts}, summed from the racks' status counts
+        self.room_nodes = {}  # Room name -> tree node
+        self.rack_nodes = {}  # Rack position -> tree node (created when its room is expanded)
+        self.host_nodes = {}  # Asset ID -> tree leaf (created when its rack page is loaded)
+        self.host_slots = {}  # Asset ID -> (rack position, index within the rack's hosts)
+        self.search_index = None  # Built in the background once racks are loaded
+        self.search_results = []
+        self.current_host = None  # Host shown in the details panel, so late K2 results can be dropped
+        # The stdout progress timer would draw over the screen; the loading indicator replaces it
+        api_client.SHOW_PROGRESS = False
         self.load_racks_tree()
 
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
@@ -83,74 +112,113 @@ class LabOpsTUI(App):
             elif node.data.get('type') == 'host':
                 self.show_host_details(node.data['host'])
             elif node.data.get('type') == 'more':
-                self.expand_more_hosts(node)
+                self.load_more_hosts(node)
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Create a room's racks or a rack's first host page the first time it is expanded"""
+        node = event.node
+        if hasattr(node.data, 'get'):
+            if node.data.get('type') == 'room':
+                self.populate_room(node)
+            elif node.data.get('type') == 'rack':
+                self.populate_rack(node)
 
     def load_racks_tree(self) -> None:
-        """Load racks into tree view grouped by room"""
+        """Show the loading indicator and fetch racks in a background worker"""
+        self.query_one("#tree_loading").remove_class("hidden")
+        self.query_one("#rack_details", TextArea).text = "Loading racks..."
+        self.fetch_racks()
+
+    @work(thread=True, exclusive=True, group="racks")
+    def fetch_racks(self) -> None:
+        """Load and group racks off the event loop (may hit the network on a cold cache)"""
         try:
-            tree = self.query_one("#rack_tree", Tree)
-            tree.clear()
-            
-            racks = get_racks()
-            
             # Group racks by room (e.g., SEA85.159, SEA85.6920)
-            rooms = {}
-            for rack in racks:
-                position = rack.get('position', '')
-                # Extract room from position (e.g., SEA85.159.R6-L01 -> SEA85.159)
-                if '.' in position:
-                    parts = position.split('.')
-                    if len(parts) >= 2:
-                        room = f"{parts[0]}.{parts[1]}"  # SEA85.159
-                    else:
-                        room = parts[0]  # Fallback
-                else:
-                    room = "Unknown"
-                
-                if room not in rooms:
-                    rooms[room] = []
-                rooms[room].append(rack)
-            
-            # Add room nodes to tree
-            for room_name, room_racks in sorted(rooms.items()):
-                total_hosts = sum(r.get('host_count', 0) for r in room_racks)
-                room_node = tree.root.add(
-                    f"{room_name} ({len(room_racks)} racks, {total_hosts} hosts)",
-                    data={'type': 'room', 'room': room_name}
-                )
-                
-                # Add rack children
-                for rack in sorted(room_racks, key=lambda x: x.get('position', '')):
-                    host_count = rack.get('host_count', 0)
-                    status_text = f"({host_count} hosts)" if host_count > 0 else "(Empty)"
-                    
-                    rack_node = room_node.add(
-                        f"{rack.get('position', 'Unknown')} {status_text}",
-                        data={'type': 'rack', 'rack': rack}
-                    )
-                    
-                    # Add host children if rack has hosts (limit display to 5 for tree view)
-                    if host_count > 0 and rack.get('hosts'):
-                        for host in rack['hosts'][:5]:  # Show first 5 hosts in tree
-                            asset_id = host.get('assetid', 'N/A')
-                            platform = host.get('platform', 'Unknown')
-                            status = host.get('status', 'Unknown')
-                            
-                            rack_node.add_leaf(
-                                f"{asset_id}: {platform} [{status}]",
-                                data={'type': 'host', 'host': host}
-                            )
-                        
-                        # Add "..." indicator if there are more hosts
-                        if len(rack['hosts']) > 5:
-                            rack_node.add_leaf(
-                                f"... and {len(rack['hosts']) - 5} more hosts",
-                                data={'type': 'more', 'rack': rack, 'rack_node': rack_node}
-                            )
-            
+            rooms, slots, room_statuses = {}, {}, {}
+            for rack in get_racks():
+                room = room_name(rack.get('position', ''))
+                rooms.setdefault(room, []).append(rack)
+                # Per-rack counts come precomputed from the columnar host store
+                statuses = room_statuses.setdefault(room, {})
+                for status, count in rack.get('status_counts', {}).items():
+                    statuses[status] = statuses.get(status, 0) + count
+                for i, host in enumerate(rack.get('hosts') or []):
+                    slots[str(host.get('assetid', ''))] = (rack.get('position'), i)
+            self.call_from_thread(self.render_rooms, rooms, slots, room_statuses)
         except Exception as e:
-            details = self.query_one("#rack_details", TextArea)
-            details.text = f"Error loading racks: {e}"
+            self.call_from_thread(self.show_load_error, f"Error loading racks: {e}")
+
+    def show_load_error(self, message) -> None:
+        self.query_one("#tree_loading").add_class("hidden")
+        self.query_one("#rack_details", TextArea).text = message
+
+    def render_rooms(self, rooms, slots, room_statuses) -> None:
+        """Add room nodes only; racks and hosts are added as rooms and racks are expanded"""
+        tree = self.query_one("#rack_tree", Tree)
+        tree.clear()
+        self.room_nodes.clear()
+        self.rack_nodes.clear()
+        self.host_nodes.clear()
+        self.rooms = rooms
+        self.host_slots = slots
+        self.room_statuses = room_statuses
+
+        # Add room nodes to tree
+        for name, room_racks in sorted(rooms.items()):
+            total_hosts = sum(room_statuses.get(name, {}).values())
+            self.room_nodes[name] = tree.root.add(
+                f"{name} ({len(room_racks)} racks, {total_hosts} hosts)",
+                data={'type': 'room', 'room': name, 'loaded': False}
+            )
+
+        self.query_one("#tree_loading").add_class("hidden")
+        self.query_one("#rack_details", TextArea).text = "Select a rack to view details"
+        self.build_search_index()
+
+    @work(thread=True, exclusive=True, group="search_index")
+    def build_search_index(self) -> None:
+        """Index every cached host for search-as-you-type"""
+        try:
+            search_index = get_search_index()
+        except Exception:
+            return  # Submitting a search still falls back to an exact lookup
+        self.call_from_thread(setattr, self, 'search_index', search_index)
+
+    def populate_room(self, room_node) -> None:
+        """Add rack children to a room node (once)"""
+        if room_node.data['loaded']:
+            return
+        room_node.data['loaded'] = True
+
+        for rack in sorted(self.rooms.get(room_node.data['room'], []), key=lambda x: x.get('position', '')):
+            host_count = rack.get('host_count', 0)
+            status_text = f"({host_count} hosts)" if host_count > 0 else "(Empty)"
+            self.rack_nodes[rack.get('position')] = room_node.add(
+                f"{rack.get('position', 'Unknown')} {status_text}",
+                data={'type': 'rack', 'rack': rack, 'loaded': False},
+                allow_expand=bool(rack.get('hosts'))
+            )
+
+    def populate_rack(self, rack_node) -> None:
+        """Add the first page of host leaves to a rack node (once)"""
+        if rack_node.data['loaded']:
+            return
+        rack_node.data['loaded'] = True
+        self.add_host_page(rack_node, 0)
+
+    def add_host_page(self, rack_node, offset) -> None:
+        """Add HOST_PAGE_SIZE host leaves starting at offset, plus a "load more" leaf if hosts remain"""
+        hosts = rack_node.data['rack'].get('hosts') or []
+        for host in hosts[offset:offset + HOST_PAGE_SIZE]:
+            leaf = rack_node.add_leaf(host_label(host), data={'type': 'host', 'host': host})
+            self.host_nodes[str(host.get('assetid', ''))] = leaf
+
+        remaining = len(hosts) - offset - HOST_PAGE_SIZE
+        if remaining > 0:
+            rack_node.add_leaf(
+                f"... load {min(remaining, HOST_PAGE_SIZE)} more ({remaining} remaining)",
+                data={'type': 'more', 'offset': offset + HOST_PAGE_SIZE}
+            )
 
     def show_rack_details(self, rack) -> None:
         """Show detailed rack information"""
@@ -178,13 +246,36 @@ class LabOpsTUI(App):
         details.text = "\n".join(rack_info)
 
     def show_host_details(self, host) -> None:
-        """Show detailed host information"""
-        details = self.query_one("#rack_details", TextArea)
-        
+        """Show detailed host information; the K2 IP fills in once the background lookup returns"""
+        self.current_host = host
+        k2_ip = 'resolving...' if host.get('hardwareid') else 'N/A'
+        self.query_one("#rack_details", TextArea).text = self.format_host_details(host, k2_ip)
+        if host.get('hardwareid'):
+            self.fetch_k2_ip(host)
+
+    @work(thread=True, exclusive=True, group="k2")
+    def fetch_k2_ip(self, host) -> None:
+        """Resolve a host's K2 IP off the event loop"""
+        try:
+            k2_ip = get_k2_ip(host.get('hardwareid')) or 'N/A'
+        except Exception:
+            k2_ip = 'N/A'
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self.show_k2_ip, host, k2_ip)
+
+    def show_k2_ip(self, host, k2_ip) -> None:
+        # Ignore results for a host the user has already moved away from
+        if self.current_host is host:
+            self.query_one("#rack_details", TextArea).text = self.format_host_details(host, k2_ip)
+
+    def format_host_details(self, host, k2_ip) -> str:
         host_info = []
         host_info.append(f"Asset ID: {host.get('assetid', 'N/A')}")
         host_info.append(f"Platform: {host.get('platform', 'Unknown')}")
-        host_info.append(f"Status: {host.get('status', 'Unknown')}")
+        status = host.get('status', 'Unknown')
+        if isinstance(status, dict):
+            status = status.get('status', 'Unknown')  # Full /hosts records (e.g., search results)
+        host_info.append(f"Status: {status}")
         host_info.append(f"Location: {host.get('location', 'N/A')}")
         host_info.append("")
         
@@ -199,13 +290,6 @@ class LabOpsTUI(App):
         else:
             host_info.append("  Console IP: N/A")
         
-        # Get K2 IP if hardware ID is available
-        k2_ip = 'N/A'
-        if host.get('hardwareid'):
-            k2_result = get_k2_ip(host.get('hardwareid'))
-            if k2_result:
-                k2_ip = k2_result
-        
         host_info.append(f"  K2 IP: {k2_ip}")
             
         if host.get('lan_ip'):
@@ -216,23 +300,28 @@ class LabOpsTUI(App):
         host_info.append("")
         host_info.append("Click on rack name to go back to rack view")
         
-        details.text = "\n".join(host_info)
+        return "\n".join(host_info)
 
-    def show_room_details(self, room_name) -> None:
+    def show_room_details(self, room) -> None:
         """Show room summary information"""
         details = self.query_one("#rack_details", TextArea)
         
         try:
-            racks = get_racks()
-            room_racks = [r for r in racks if r.get('position', '').startswith(room_name)]
+            room_racks = self.rooms.get(room, [])
             
             room_info = []
-            room_info.append(f"Room: {room_name}")
+            room_info.append(f"Room: {room}")
             room_info.append(f"Total Racks: {len(room_racks)}")
             
-            total_hosts = sum(r.get('host_count', 0) for r in room_racks)
-            room_info.append(f"Total Hosts: {total_hosts}")
+            statuses = self.room_statuses.get(room, {})
+            room_info.append(f"Total Hosts: {sum(statuses.values())}")
             room_info.append("")
+
+            if statuses:
+                room_info.append("Hosts by Status:")
+                for status, count in sorted(statuses.items(), key=lambda item: -item[1]):
+                    room_info.append(f"  {status}: {count}")
+                room_info.append("")
             
             if room_racks:
                 room_info.append("Racks in Room:")
@@ -249,26 +338,13 @@ class LabOpsTUI(App):
         except Exception as e:
             details.text = f"Error loading room details: {e}"
 
-    def expand_more_hosts(self, more_node) -> None:
-        """Expand the remaining hosts in the tree"""
+    def load_more_hosts(self, more_node) -> None:
+        """Replace the "load more" leaf with the next page of hosts"""
         try:
-            rack = more_node.data['rack']
             rack_node = more_node.parent  # Get the rack node
-            
-            # Remove the "more" node
+            offset = more_node.data['offset']
             more_node.remove()
-            
-            # Add the remaining hosts (from index 5 onwards)
-            if rack.get('hosts') and len(rack['hosts']) > 5:
-                for host in rack['hosts'][5:]:  # Show remaining hosts
-                    asset_id = host.get('assetid', 'N/A')
-                    platform = host.get('platform', 'Unknown')
-                    status = host.get('status', 'Unknown')
-                    
-                    rack_node.add_leaf(
-                        f"{asset_id}: {platform} [{status}]",
-                        data={'type': 'host', 'host': host}
-                    )
+            self.add_host_page(rack_node, offset)
             
         except Exception as e:
             details = self.query_one("#rack_details", TextArea)
@@ -278,7 +354,7 @@ class LabOpsTUI(App):
         """Start search mode like vim"""
         search_input = self.query_one("#search_input", Input)
         search_input.remove_class("hidden")
-        search_input.placeholder = "/Search (Asset ID or Hardware ID)..."
+        search_input.placeholder = "/Search (Asset ID, Hardware ID, hostname, platform or IP)..."
         search_input.focus()
         search_input.value = "/"
 
@@ -286,31 +362,29 @@ class LabOpsTUI(App):
         """Search for host by asset ID or hardware ID"""
         details = self.query_one("#rack_details", TextArea)
         details.text = "Searching..."
-        
+        self.fetch_search_result(query)
+
+    @work(thread=True, exclusive=True, group="search")
+    def fetch_search_result(self, query: str) -> None:
+        """Look the host up off the event loop (the host index may need loading)"""
         try:
-            # Search in cached hosts data
-            hosts_data = get_hosts()
-            hosts = hosts_data.get('response', [])
-            
-            found_host = None
-            
-            # Search by asset ID or hardware ID
-            for host in hosts:
-                if (str(host.get('assetid', '')).lower() == query.lower() or 
-                    str(host.get('hardwareid', '')).lower() == query.lower()):
-                    found_host = host
-                    break
-            
-            if found_host:
-                self.show_host_details(found_host)
-                # Expand first, then highlight after a short delay
-                self.expand_to_host(found_host)
-                self.set_timer(0.1, lambda: self.highlight_host(found_host))
-            else:
-                details.text = f"Host not found: {query}\n\nTry searching by:\n- Asset ID (e.g., 1703827523)\n- Hardware ID (e.g., SNX.HMBLT21N062500123)\n\nPress '/' to search again"
-                
+            # Search by asset ID or hardware ID via the cached host index
+            found_host = find_host(query)
         except Exception as e:
-            details.text = f"Search error: {e}"
+            self.call_from_thread(self.show_load_error, f"Search error: {e}")
+            return
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self.show_search_result, query, found_host)
+
+    def show_search_result(self, query, found_host) -> None:
+        if found_host:
+            self.show_host_details(found_host)
+            # Expand first, then highlight after a short delay
+            self.expand_to_host(found_host)
+            self.set_timer(0.1, lambda: self.highlight_host(found_host))
+        else:
+            details = self.query_one("#rack_details", TextArea)
+            details.text = f"Host not found: {query}\n\nTry searching by:\n- Asset ID (e.g., 1703827523)\n- Hardware ID (e.g., SNX.HMBLT21N062500123)\n\nPress '/' to search again"
 
     def action_copy_text(self) -> None:
         """Copy selected text from TextArea"""
@@ -330,49 +404,32 @@ class LabOpsTUI(App):
             self.notify(f"Copy failed: {e}")
 
     def expand_to_host(self, host) -> None:
-        """Expand tree to show the host's location"""
+        """Expand tree to show the host's location, loading pages until its leaf exists"""
         try:
-            tree = self.query_one("#rack_tree", Tree)
-            location = host.get('location', '')
-            
-            # Extract room from location (e.g., SEA85.159.R6-L01.40 -> SEA85.159)
-            if '.' in location:
-                parts = location.split('.')
-                if len(parts) >= 2:
-                    room_name = f"{parts[0]}.{parts[1]}"  # SEA85.159
-                    
-                    # Find and expand the room node
-                    for room_node in tree.root.children:
-                        if room_name in str(room_node.label):
-                            room_node.expand()
-                            
-                            # Find and expand the rack node
-                            rack_position = location.split()[0] if ' ' in location else location.rstrip().split('.')[0:3]
-                            if isinstance(rack_position, list):
-                                rack_position = '.'.join(rack_position)
-                            
-                            for rack_node in room_node.children:
-                                if rack_position in str(rack_node.label):
-                                    rack_node.expand()
-                                    
-                                    # Check if host is in the "more hosts" section
-                                    asset_id = str(host.get('assetid', ''))
-                                    host_found_in_visible = False
-                                    
-                                    # Check first 5 visible hosts
-                                    for host_node in rack_node.children:
-                                        if asset_id in str(host_node.label):
-                                            host_found_in_visible = True
-                                            break
-                                    
-                                    # If not found in visible hosts, expand "more hosts" section
-                                    if not host_found_in_visible:
-                                        for more_node in rack_node.children:
-                                            if "more hosts" in str(more_node.label):
-                                                self.expand_more_hosts(more_node)
-                                                break
-                                    break
-                            break
+            asset_id = str(host.get('assetid', ''))
+            slot = self.host_slots.get(asset_id)
+            if slot is None:
+                return  # Not in the tree (e.g., a host outside the default location)
+            rack_position = slot[0]
+
+            room_node = self.room_nodes.get(room_name(rack_position))
+            if room_node is None:
+                return
+            self.populate_room(room_node)
+            room_node.expand()
+
+            rack_node = self.rack_nodes.get(rack_position)
+            if rack_node is None:
+                return
+            self.populate_rack(rack_node)
+            rack_node.expand()
+
+            # Page forward until the host's leaf has been created; "load more" is always the last child
+            while asset_id not in self.host_nodes and rack_node.children:
+                last = rack_node.children[-1]
+                if last.data.get('type') != 'more':
+                    break
+                self.load_more_hosts(last)
         except Exception as e:
             # Silently fail if tree expansion doesn't work
             pass
@@ -381,26 +438,42 @@ class LabOpsTUI(App):
         """Highlight the host in the tree after expansion is complete"""
         try:
             tree = self.query_one("#rack_tree", Tree)
-            asset_id = str(host.get('assetid', ''))
-            
-            # Find the host node in the expanded tree
-            for room_node in tree.root.children:
-                for rack_node in room_node.children:
-                    for host_node in rack_node.children:
-                        if asset_id in str(host_node.label):
-                            # Focus the tree first
-                            tree.focus()
-                            # Set cursor to the node
-                            tree.cursor_line = host_node._line
-                            # Scroll to make it visible
-                            tree.scroll_to_line(host_node._line)
-                            return
+            host_node = self.host_nodes.get(str(host.get('assetid', '')))
+            if host_node is not None:
+                # Focus the tree first
+                tree.focus()
+                # Set cursor to the node
+                tree.cursor_line = host_node._line
+                # Scroll to make it visible
+                tree.scroll_to_line(host_node._line)
         except Exception as e:
             # Silently fail if highlighting doesn't work
             pass
 
 
 
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Update the live search results on every keystroke"""
+        if event.input.id != "search_input":
+            return
+        query = event.value.strip().lstrip("/")
+        self.search_results = []
+        if not query:
+            return
+        if self.search_index is None:
+            self.query_one("#rack_details", TextArea).text = "Indexing hosts... press Enter for an exact ID lookup"
+            return
+
+        self.search_results = self.search_index.search(query, SEARCH_RESULT_LIMIT)
+        lines = [f"{len(self.search_results)}{'+' if len(self.search_results) >= SEARCH_RESULT_LIMIT else ''} matches for '{query}' (Enter opens the first)", ""]
+        for host in self.search_results:
+            status = host.get('status')
+            if isinstance(status, dict):
+                status = status.get('status')
+            lines.append(f"  {host.get('assetid', 'N/A'):<12} {host.get('hostname') or '':<32} "
+                         f"{host.get('platform') or '':<10} {status or '':<12} {host.get('con_ip') or ''}")
+        self.query_one("#rack_details", TextArea).text = "\n".join(lines)
+
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """Handle search input submission"""
         if event.input.id == "search_input":
@@ -408,8 +481,11 @@ class LabOpsTUI(App):
             if query.startswith("/"):
                 query = query[1:]  # Remove the / prefix
             
-            if query:
+            if self.search_results:
+                self.show_search_result(query, self.search_results[0])
+            elif query:
                 self.search_host(query)
+            self.search_results = []
             
             # Hide search input
             event.input.add_class("hidden")
@@ -0,0 +1,95 @@
+# Distinct values of a host field with counts, for prefix and fuzzy (n-gram) suggestions
+from bisect import bisect_left
+
+
+def field_value(host, field):
+    """A host's value for a catalogued field, flattening the nested /hosts shapes"""
+    value = host.get(field)
+    if isinstance(value, dict):
+        # usagetype/status are {"usagetype": ...}; owners may be user records
+        value = value.get(field) or value.get('username') or value.get('name')
+    return str(value) if value else None
+
+
+def _bigrams(text):
+    """Bigrams of text padded with spaces, so first and last characters carry weight"""
+    padded = f" {text} "
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class ValueCatalog:
+    """Distinct values of one field, keyed by their lowercased form.
+
+    ``keys`` is sorted so prefix lookups are a bisect; the bigram index behind
+    ``similar`` is built on the first fuzzy lookup.
+    """
+
+    def __init__(self, values):
+        counts = {}
+        spellings = {}  # Key -> {original spelling: count}
+        for value in values:
+            if not value:
+                continue
+            key = value.lower()
+            counts[key] = counts.get(key, 0) + 1
+            variants = spellings.setdefault(key, {})
+            variants[value] = variants.get(value, 0) + 1
+
+        self.counts = counts
+        self.names = {key: max(variants, key=variants.get) for key, variants in spellings.items()}
+        self.keys = sorted(counts)
+        self._grams = None  # Bigram -> keys containing it
+        self._gram_counts = None  # Key -> number of distinct bigrams
+
+    @classmethod
+    def of(cls, hosts, field):
+        return cls(field_value(host, field) for host in hosts if isinstance(host, dict))
+
+    def prefix(self, query):
+        """Keys starting with query, in sorted order"""
+        query = query.lower()
+        keys = []
+        for i in range(bisect_left(self.keys, query), len(self.keys)):
+            if not self.keys[i].startswith(query):
+                break
+            keys.append(self.keys[i])
+        return keys
+
+    def substring(self, query):
+        """Keys containing query, in sorted order"""
+        query = query.lower()
+        return [key for key in self.keys if query in key]
+
+    def similar(self, query, limit=10, cutoff=0.2):
+        """Keys ranked by bigram Dice similarity to query, best first"""
+        if self._grams is None:
+            grams, gram_counts = {}, {}
+            for key in self.keys:
+                key_grams = _bigrams(key)
+                gram_counts[key] = len(key_grams)
+                for gram in key_grams:
+                    grams.setdefault(gram, []).append(key)
+            self._grams, self._gram_counts = grams, gram_counts
+
+        query_grams = _bigrams(query.lower())
+        shared = {}
+        for gram in query_grams:
+            for key in self._grams.get(gram, ()):
+                shared[key] = shared.get(key, 0) + 1
+
+        scored = []
+        for key, common in shared.items():
+            score = 2 * common / (len(query_grams) + self._gram_counts[key])
+            if score >= cutoff:
+                scored.append((-score, key))
+        return [key for _, key in sorted(scored)[:limit]]
+
+    def suggest(self, query, limit=10):
+        """Closest keys to a query with no exact match: prefix matches, else substring, else fuzzy"""
+        query = query.strip().lower()
+        return self.prefix(query) or self.substring(query) or self.similar(query, limit)
+
+    def resolve(self, query):
+        """Keys a filter query selects: the exact key when it exists, otherwise the keys starting with it"""
+        query = query.strip().lower()
+        return [query] if query in self.counts else self.prefix(query)